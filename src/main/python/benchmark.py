@@ -0,0 +1,185 @@
+# USAGE
+# python benchmark.py --output results.json
+# python benchmark.py --compare baseline.json results.json
+
+# import the necessary packages
+from preprocessing import SimplePreprocessor
+from datasets import SimpleDatasetLoader
+from filters import convolve
+from filters import correlate
+from filters import filter_bank
+from filters import morphology_ex
+from filters import kernelBank
+from neighbors import KNNClassifier
+import numpy as np
+import platform
+import argparse
+import tempfile
+import shutil
+import json
+import time
+import sys
+import os
+import cv2
+
+def best_of(fn, repeats):
+	# time the function a few times and keep the fastest run, which is
+	# the least disturbed by whatever else the machine is doing
+	timings = []
+	for _ in range(repeats):
+		start = time.perf_counter()
+		fn()
+		timings.append(time.perf_counter() - start)
+
+	return min(timings)
+
+def make_dataset(path, rng, classes=3, perClass=100, size=(240, 320)):
+	# write a synthetic dataset laid out as {class}/{image}.jpg
+	imagePaths = []
+	for c in range(classes):
+		os.makedirs(os.path.join(path, "class{}".format(c)))
+		for i in range(perClass):
+			image = rng.integers(0, 256, size + (3,), dtype="uint8")
+			imagePath = os.path.join(path, "class{}".format(c),
+				"{}.jpg".format(i))
+			cv2.imwrite(imagePath, cv2.GaussianBlur(image, (5, 5), 0))
+			imagePaths.append(imagePath)
+
+	return imagePaths
+
+def bench_loader(results, rng, repeats):
+	path = tempfile.mkdtemp()
+	try:
+		imagePaths = make_dataset(path, rng)
+
+		# measure the load + preprocess throughput both serially and
+		# spread across all cores
+		for workers in (1, -1):
+			sdl = SimpleDatasetLoader(preprocessors=[SimplePreprocessor(32, 32)],
+				workers=workers)
+			seconds = best_of(lambda: sdl.load(imagePaths), repeats)
+			name = "loader/workers={}".format(workers)
+			results[name] = {"value": len(imagePaths) / seconds,
+				"unit": "images/s", "higher_is_better": True}
+	finally:
+		shutil.rmtree(path)
+
+def bench_convolve(results, rng, repeats, size=(1080, 1920)):
+	gray = cv2.GaussianBlur(rng.integers(0, 256, size, dtype="uint8"), (5, 5), 0)
+
+	# measure our `convolve` against OpenCV's `filter2D` for every kernel
+	for (kernelName, kernel) in kernelBank:
+		for (impl, fn) in (("convolve", lambda: convolve(gray, kernel)),
+			("filter2D", lambda: cv2.filter2D(gray, -1, kernel))):
+			seconds = best_of(fn, repeats)
+			name = "convolve/{}/{}".format(kernelName, impl)
+			results[name] = {"value": seconds * 1000.0, "unit": "ms/frame",
+				"higher_is_better": False}
+
+def bench_filter_bank(results, rng, repeats, size=(1080, 1920)):
+	# measure the whole kernel bank applied at once against one
+	# `correlate` call per kernel, on a grayscale and a color frame
+	for channels in (1, 3):
+		shape = size if channels == 1 else size + (channels,)
+		image = cv2.GaussianBlur(rng.integers(0, 256, shape, dtype="uint8"),
+			(5, 5), 0)
+		out = filter_bank(image, kernelBank)
+
+		for (impl, fn) in (("filter_bank", lambda: filter_bank(image, kernelBank)),
+			("filter_bank+out", lambda: filter_bank(image, kernelBank, out=out)),
+			("correlate", lambda: [correlate(image, k) for (_, k) in kernelBank])):
+			seconds = best_of(fn, repeats)
+			name = "filterbank/channels={}/{}".format(channels, impl)
+			results[name] = {"value": seconds * 1000.0, "unit": "ms/frame",
+				"higher_is_better": False}
+
+def bench_morphology(results, rng, repeats, size=(1080, 1920)):
+	# measure `morphology_ex` against `cv2.morphologyEx` for a large
+	# closing and for a small erosion repeated a few times
+	gray = cv2.GaussianBlur(rng.integers(0, 256, size, dtype="uint8"), (5, 5), 0)
+	cases = (("close/51x51", cv2.MORPH_CLOSE, (51, 51), 1),
+		("close/3x3", cv2.MORPH_CLOSE, (3, 3), 1),
+		("erode/3x3x3", cv2.MORPH_ERODE, (3, 3), 3))
+
+	for (caseName, op, ksize, iterations) in cases:
+		kernel = cv2.getStructuringElement(cv2.MORPH_RECT, ksize)
+		for (impl, fn) in (("morphology_ex", lambda: morphology_ex(gray, op, ksize,
+			iterations)), ("cv2", lambda: cv2.morphologyEx(gray, op, kernel,
+			iterations=iterations))):
+			seconds = best_of(fn, repeats)
+			name = "morphology/{}/{}".format(caseName, impl)
+			results[name] = {"value": seconds * 1000.0, "unit": "ms/frame",
+				"higher_is_better": False}
+
+def bench_knn(results, rng, repeats, sizes=(1000, 5000, 20000), queries=500):
+	# measure the fit and predict latency of the k-NN engine on raw
+	# 32x32x3 pixel vectors at several training set sizes
+	testX = rng.integers(0, 256, (queries, 3072), dtype="uint8")
+	for n in sizes:
+		trainX = rng.integers(0, 256, (n, 3072), dtype="uint8")
+		trainY = rng.integers(0, 3, n)
+		model = KNNClassifier(neighbors=3)
+
+		fitSeconds = best_of(lambda: model.fit(trainX, trainY), repeats)
+		predictSeconds = best_of(lambda: model.predict(testX), repeats)
+		results["knn/n={}/fit".format(n)] = {"value": fitSeconds * 1000.0,
+			"unit": "ms", "higher_is_better": False}
+		results["knn/n={}/predict".format(n)] = {"value": predictSeconds * 1000.0,
+			"unit": "ms", "higher_is_better": False}
+
+def compare(baseline, current, threshold):
+	# flag every benchmark that got worse by more than the threshold
+	regressions = []
+	for (name, new) in sorted(current["results"].items()):
+		old = baseline["results"].get(name)
+		if old is None:
+			continue
+
+		delta = (new["value"] - old["value"]) / old["value"]
+		worse = -delta if new["higher_is_better"] else delta
+
+		status = "REGRESSION" if worse > threshold else "ok"
+		if status == "REGRESSION":
+			regressions.append(name)
+
+		print("{:<40} {:>12.3f} -> {:>12.3f} {:<9} {:+7.1%} {}".format(name,
+			old["value"], new["value"], new["unit"], delta, status))
+
+	return regressions
+
+# construct the argument parse and parse the arguments
+ap = argparse.ArgumentParser()
+ap.add_argument("-o", "--output", default="benchmark.json", help="path to the output results file")
+ap.add_argument("-r", "--repeats", type=int, default=3, help="# of timed runs per benchmark (the fastest is kept)")
+ap.add_argument("-s", "--seed", type=int, default=42, help="seed for the synthetic data")
+ap.add_argument("-b", "--bench", nargs="+", default=["loader", "convolve", "filterbank", "morphology", "knn"], choices=["loader", "convolve", "filterbank", "morphology", "knn"], help="benchmarks to run")
+ap.add_argument("-c", "--compare", nargs=2, default=None, metavar=("BASELINE", "CURRENT"), help="compare two results files instead of running")
+ap.add_argument("-t", "--threshold", type=float, default=0.1, help="relative slowdown flagged as a regression")
+args = vars(ap.parse_args())
+
+# compare two runs and exit with a non-zero status on regressions
+if args["compare"] is not None:
+	(baseline, current) = [json.load(open(p)) for p in args["compare"]]
+	regressions = compare(baseline, current, args["threshold"])
+	print("[INFO] {} regression(s)".format(len(regressions)))
+	sys.exit(1 if len(regressions) > 0 else 0)
+
+# run the requested benchmarks on freshly generated synthetic data
+results = {}
+for bench in args["bench"]:
+	print("[INFO] running {} benchmarks...".format(bench))
+	rng = np.random.default_rng(args["seed"])
+	{"loader": bench_loader, "convolve": bench_convolve,
+		"filterbank": bench_filter_bank, "morphology": bench_morphology,
+		"knn": bench_knn}[bench](results, rng, args["repeats"])
+
+# record the environment alongside the results so runs can be compared
+report = {
+	"meta": {"python": platform.python_version(), "numpy": np.__version__,
+		"opencv": cv2.__version__, "machine": platform.machine(),
+		"cpus": os.cpu_count(), "seed": args["seed"],
+		"repeats": args["repeats"], "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+	"results": results
+}
+json.dump(report, open(args["output"], "w"), indent=2, sort_keys=True)
+print("[INFO] wrote {} results to {}".format(len(results), args["output"]))
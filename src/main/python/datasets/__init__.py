@@ -1 +1,8 @@
-from .simpledatasetloader import SimpleDatasetLoader
\ No newline at end of file
+from .simpledatasetloader import SimpleDatasetLoader
+from .datasetcache import DatasetCache
+from .datasetmanifest import DatasetManifest
+from .urlfetcher import URLFetcher
+from .imagewriter import ImageWriter
+from .loadermetrics import LoaderMetrics
+from .loadermetrics import ProgressReporter
+from .loadermetrics import JSONReporter
\ No newline at end of file
@@ -0,0 +1,132 @@
+import numpy as np
+import hashlib
+import json
+import os
+
+def describe(obj):
+    # a stable description of a preprocessor's configuration, recursing
+    # into nested preprocessors (e.g. the chain of a pipeline) so object
+    # addresses never end up in the key
+    if isinstance(obj, (list, tuple)):
+        return [describe(o) for o in obj]
+    if hasattr(obj, "__dict__"):
+        return [type(obj).__name__,
+            [(k, describe(v)) for (k, v) in sorted(vars(obj).items())]]
+
+    return obj
+
+class DatasetCache:
+    def __init__(self, cacheDir, maxEntries=4, trustManifest=False):
+        # store the directory the preprocessed datasets are written to,
+        # along with the number of entries kept in it -- every changed
+        # image or preprocessor makes a new entry, so the least recently
+        # used ones are removed as new ones are written (None keeps all).
+        # `trustManifest` lets a DatasetManifest's fingerprint stand in for
+        # stat'ing every file, which is only safe when images are never
+        # rewritten in place (the manifest does not notice those)
+        self.cacheDir = cacheDir
+        self.maxEntries = maxEntries
+        self.trustManifest = trustManifest
+        os.makedirs(self.cacheDir, exist_ok=True)
+
+    def key(self, imagePaths, preprocessors, options=None):
+        # the cache key covers the image manifest (path, size and
+        # modification time of every file) so that any added, removed
+        # or modified image invalidates the entry
+        h = hashlib.sha1()
+
+        # a DatasetManifest records the size and modification time of
+        # every file as of its last refresh, so its fingerprint only
+        # stands in for the stat calls when the manifest is trusted
+        if hasattr(imagePaths, "fingerprint") and self.trustManifest:
+            h.update(imagePaths.fingerprint().encode("utf-8"))
+        else:
+            if hasattr(imagePaths, "image_paths"):
+                imagePaths = imagePaths.image_paths()
+
+            for imagePath in imagePaths:
+                st = os.stat(imagePath)
+                h.update("{}\0{}\0{}\n".format(imagePath, st.st_size,
+                    st.st_mtime_ns).encode("utf-8"))
+
+        # along with the class and parameters of every preprocessor
+        # (e.g. width, height and interpolation of a SimplePreprocessor)
+        config = [describe(p) for p in preprocessors]
+        h.update(json.dumps(config, default=str).encode("utf-8"))
+
+        # and any loader options that change the decoded pixels
+        if options is not None:
+            h.update(json.dumps(sorted(options.items()),
+                default=str).encode("utf-8"))
+
+        return h.hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cacheDir, key)
+        return (base + ".data.npy", base + ".labels.npy", base + ".classes.npy")
+
+    def get(self, key):
+        (dataPath, labelsPath, classesPath) = self._paths(key)
+
+        # the data file is written last, so its presence means the
+        # whole entry is complete
+        if not os.path.exists(dataPath):
+            return None
+
+        # memory map the data so a warm start only touches the pages it
+        # needs and several processes share the same page cache
+        data = np.load(dataPath, mmap_mode="r")
+        labels = np.load(labelsPath)
+        classes = np.load(classesPath)
+
+        # mark the entry as recently used
+        os.utime(dataPath)
+
+        return (data, labels, classes)
+
+    def put(self, key, data, labels, classes):
+        paths = self._paths(key)
+
+        # write every array to a temporary file first and then move it
+        # into place so readers never observe a partially written entry
+        for (path, arr) in reversed(list(zip(paths, (data, labels, classes)))):
+            tmpPath = "{}.{}.tmp".format(path, os.getpid())
+            with open(tmpPath, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmpPath, path)
+
+        if self.maxEntries is not None:
+            self.prune(self.maxEntries, keep=(key,))
+
+        return self.get(key)
+
+    def entries(self):
+        # the keys of every complete entry, least recently used first
+        suffix = ".data.npy"
+        names = [n for n in os.listdir(self.cacheDir) if n.endswith(suffix)]
+        names.sort(key=lambda n: os.stat(os.path.join(self.cacheDir,
+            n)).st_mtime_ns)
+
+        return [n[:-len(suffix)] for n in names]
+
+    def prune(self, maxEntries=0, keep=()):
+        # remove the least recently used entries (never the ones in
+        # `keep`) until at most `maxEntries` are left, returning the keys
+        # removed -- `prune()` empties the cache
+        keys = self.entries()
+        removed = []
+
+        for key in keys:
+            if len(keys) - len(removed) <= maxEntries:
+                break
+            if key in keep:
+                continue
+
+            # remove the data file first so the entry is never seen as
+            # complete while its other files are going away
+            for path in self._paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+            removed.append(key)
+
+        return removed
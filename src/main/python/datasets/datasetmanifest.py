@@ -0,0 +1,168 @@
+import numpy as np
+import hashlib
+import os
+from .imagesize import image_size
+
+# the file extensions considered to be images
+IMAGE_TYPES = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+class DatasetManifest:
+    def __init__(self, root):
+        # the manifest indexes every image below the root directory as
+        # one row per file (relative directory, name, label id, size,
+        # mtime, width and height), stored as flat NumPy arrays
+        self.root = root
+        self.dirs = np.array([], dtype="str")
+        self.dirMtimes = np.array([], dtype="int64")
+        self.fileDirs = np.array([], dtype="int64")
+        self.names = np.array([], dtype="str")
+        self.sizes = np.array([], dtype="int64")
+        self.mtimes = np.array([], dtype="int64")
+        self.widths = np.array([], dtype="int32")
+        self.heights = np.array([], dtype="int32")
+        self._index_labels()
+
+    @classmethod
+    def open(cls, root, path):
+        # load the manifest stored at `path` (if any), bring it up to date
+        # with the tree and write it back when something changed
+        manifest = cls(root)
+        if os.path.exists(path):
+            manifest.load(path)
+
+        if manifest.refresh() or not os.path.exists(path):
+            manifest.save(path)
+
+        return manifest
+
+    def _scan_dir(self, rel):
+        # list a single directory, reading the dimensions of every image
+        # from the first bytes of its header
+        files = []
+        subdirs = []
+
+        with os.scandir(os.path.join(self.root, rel)) as it:
+            for entry in it:
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                elif entry.name.lower().endswith(IMAGE_TYPES):
+                    st = entry.stat()
+                    with open(entry.path, "rb") as f:
+                        size = image_size(f.read(1 << 16))
+                    (w, h) = size if size is not None else (-1, -1)
+                    files.append((entry.name, st.st_size, st.st_mtime_ns, w, h))
+
+        mtime = os.stat(os.path.join(self.root, rel)).st_mtime_ns
+        return (mtime, sorted(files), subdirs)
+
+    def refresh(self):
+        # only directories are stat'ed: adding, removing or renaming a
+        # file changes the modification time of its directory, so only
+        # those directories (and any new subdirectories) are listed again
+        # -- NOTE: files rewritten in place are not picked up
+        bounds = np.searchsorted(self.fileDirs, np.arange(len(self.dirs) + 1))
+        known = set(self.dirs.tolist())
+        pieces = {}
+        pending = [] if len(known) > 0 else [""]
+
+        for (i, rel) in enumerate(self.dirs.tolist()):
+            try:
+                mtime = os.stat(os.path.join(self.root, rel)).st_mtime_ns
+            except FileNotFoundError:
+                continue
+
+            if mtime != self.dirMtimes[i]:
+                pending.append(rel)
+                continue
+
+            # unchanged directories keep their rows as they are
+            rows = slice(bounds[i], bounds[i + 1])
+            pieces[rel] = (mtime, (self.names[rows], self.sizes[rows],
+                self.mtimes[rows], self.widths[rows], self.heights[rows]))
+
+        changed = len(pending) > 0 or len(pieces) != len(known)
+
+        while len(pending) > 0:
+            rel = pending.pop()
+            (mtime, files, subdirs) = self._scan_dir(rel)
+            columns = list(zip(*files)) if len(files) > 0 else [[]] * 5
+            pieces[rel] = (mtime, (np.array(columns[0], dtype="str"),
+                np.array(columns[1], dtype="int64"),
+                np.array(columns[2], dtype="int64"),
+                np.array(columns[3], dtype="int32"),
+                np.array(columns[4], dtype="int32")))
+
+            for name in subdirs:
+                sub = os.path.join(rel, name)
+                if sub not in known:
+                    pending.append(sub)
+
+        if changed:
+            self._assemble(pieces)
+
+        return changed
+
+    def _assemble(self, pieces):
+        # rebuild the flat arrays with the directories in sorted order
+        dirs = sorted(pieces)
+        self.dirs = np.array(dirs, dtype="str")
+        self.dirMtimes = np.array([pieces[d][0] for d in dirs], dtype="int64")
+        self.fileDirs = np.repeat(np.arange(len(dirs)),
+            [len(pieces[d][1][0]) for d in dirs]).astype("int64")
+
+        columns = [[pieces[d][1][c] for d in dirs] for c in range(5)]
+        (self.names, self.sizes, self.mtimes, self.widths, self.heights) = [
+            np.concatenate(col) if len(col) > 0 else np.array([])
+            for col in columns]
+        self.names = self.names.astype("str")
+        self._index_labels()
+
+    def _index_labels(self):
+        # the label of every image is the name of its directory, encoded
+        # as an integer into the sorted table of classes (only directories
+        # that actually hold images count as classes)
+        dirLabels = np.array([os.path.basename(d) for d in self.dirs.tolist()],
+            dtype="str")
+        used = np.unique(self.fileDirs)
+        (self.classes, ids) = np.unique(dirLabels[used], return_inverse=True)
+        dirIds = np.full(len(self.dirs), -1, dtype="int64")
+        dirIds[used] = ids.reshape(-1)
+        self.labels = dirIds[self.fileDirs].astype(
+            np.min_scalar_type(max(len(self.classes) - 1, 0)))
+
+    def load(self, path):
+        with np.load(path) as f:
+            (self.dirs, self.dirMtimes, self.fileDirs, self.names, self.sizes,
+                self.mtimes, self.widths, self.heights) = [f[k] for k in
+                ("dirs", "dirMtimes", "fileDirs", "names", "sizes", "mtimes",
+                "widths", "heights")]
+        self._index_labels()
+
+    def save(self, path):
+        # write the manifest atomically so concurrent readers never see a
+        # partially written file
+        tmpPath = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmpPath, "wb") as f:
+            np.savez(f, dirs=self.dirs, dirMtimes=self.dirMtimes,
+                fileDirs=self.fileDirs, names=self.names, sizes=self.sizes,
+                mtimes=self.mtimes, widths=self.widths, heights=self.heights)
+        os.replace(tmpPath, path)
+
+    def image_paths(self):
+        # the absolute path of every image, in manifest order
+        return [os.path.join(self.root, d, n) for (d, n) in
+            zip(self.dirs[self.fileDirs].tolist(), self.names.tolist())]
+
+    def fingerprint(self):
+        # a digest of every (path, size, mtime) row, letting a dataset
+        # cache built with `trustManifest` key an entry without stat'ing
+        # every file again (so files rewritten in place go unnoticed)
+        h = hashlib.sha1(os.path.abspath(self.root).encode("utf-8"))
+        for arr in (self.dirs, self.fileDirs, self.names, self.sizes,
+            self.mtimes):
+            h.update(np.ascontiguousarray(arr).tobytes())
+
+        return h.hexdigest()
+
+    def __len__(self):
+        return len(self.names)
@@ -0,0 +1,56 @@
+import numpy as np
+import cv2
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, ...)
+SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# the reduced decoding flags, largest reduction first
+REDUCED_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+def image_size(data):
+    # read the (width, height) of a JPEG or PNG image from its header
+    # bytes without decoding it, returning None for anything else
+    data = bytes(data[:1 << 16]) if isinstance(data, np.ndarray) else data
+
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return (int.from_bytes(data[16:20], "big"),
+            int.from_bytes(data[20:24], "big"))
+
+    if data[:2] != b"\xff\xd8":
+        return None
+
+    # walk the JPEG segments until the frame header
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None
+
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if marker in SOF_MARKERS and i + 9 <= len(data):
+            return (int.from_bytes(data[i + 7:i + 9], "big"),
+                int.from_bytes(data[i + 5:i + 7], "big"))
+
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+
+    return None
+
+def reduced_flag(size, target):
+    # pick the strongest reduction (1/8, 1/4 or 1/2) for which the
+    # decoded image is still at least as large as the target along both
+    # axes -- whatever its EXIF orientation
+    if size is None:
+        return cv2.IMREAD_COLOR
+
+    need = max(target)
+    for (factor, flag) in REDUCED_FLAGS:
+        if -(-size[0] // factor) >= need and -(-size[1] // factor) >= need:
+            return flag
+
+    return cv2.IMREAD_COLOR
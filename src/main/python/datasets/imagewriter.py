@@ -0,0 +1,109 @@
+import cv2
+import os
+import queue
+import threading
+
+# the encoder parameters used when none are given for a format
+DEFAULT_PARAMS = {
+    ".jpg": [cv2.IMWRITE_JPEG_QUALITY, 95],
+    ".jpeg": [cv2.IMWRITE_JPEG_QUALITY, 95],
+    ".png": [cv2.IMWRITE_PNG_COMPRESSION, 3],
+}
+
+class ImageWriter:
+    def __init__(self, workers=4, maxPending=64, params=None):
+        # images are handed to a pool of worker threads through a bounded
+        # queue: `write` returns as soon as the image is queued (so the
+        # caller keeps computing while earlier images are encoded and
+        # written) and blocks once `maxPending` images are waiting, which
+        # bounds memory when the disk cannot keep up
+        self.params = dict(DEFAULT_PARAMS)
+        if params is not None:
+            self.params.update({k.lower(): v for (k, v) in params.items()})
+
+        self.queue = queue.Queue(maxsize=maxPending)
+        self.lock = threading.Lock()
+        self.errors = []
+        self.closed = False
+        self.threads = [threading.Thread(target=self._work, daemon=True)
+            for _ in range(workers)]
+
+        for thread in self.threads:
+            thread.start()
+
+    def write(self, path, image, copy=True):
+        # queue the image to be written to `path` (in the format given by
+        # its extension); the image is copied unless told otherwise, since
+        # callers often recycle their buffers
+        if self.closed:
+            raise ValueError("write to a closed ImageWriter")
+
+        self.queue.put((path, image.copy() if copy else image))
+
+    def _write(self, path, image):
+        # encode in memory (`cv2.imencode` releases the GIL), then write to
+        # a temporary file next to the target and move it into place, so
+        # readers never observe a partially written image
+        ext = os.path.splitext(path)[1].lower()
+        (ok, buf) = cv2.imencode(ext, image, self.params.get(ext, []))
+        if not ok:
+            raise IOError("could not encode image as {}".format(ext))
+
+        tmpPath = "{}.{}.{}.tmp".format(path, os.getpid(),
+            threading.get_ident())
+        try:
+            with open(tmpPath, "wb") as f:
+                f.write(buf)
+            os.replace(tmpPath, path)
+        except BaseException:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            raise
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+
+            try:
+                # a None item tells the worker to stop
+                if item is None:
+                    return
+
+                self._write(*item)
+            except Exception as e:
+                with self.lock:
+                    self.errors.append((item[0], e))
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        # wait for every queued image to be written and raise an error
+        # describing every failed write since the last flush
+        self.queue.join()
+
+        with self.lock:
+            (errors, self.errors) = (self.errors, [])
+
+        if len(errors) > 0:
+            details = "; ".join("{}: {}".format(p, e) for (p, e) in errors)
+            raise IOError("failed to write {} image(s): {}".format(
+                len(errors), details)) from errors[0][1]
+
+    def close(self):
+        # flush the remaining images and stop the workers
+        if self.closed:
+            return
+
+        self.closed = True
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
@@ -0,0 +1,116 @@
+import json
+import time
+import tracemalloc
+
+class ProgressReporter:
+    def __init__(self, every):
+        # print the progress every `every` images (the loader's classic
+        # `verbose` behavior)
+        self.every = every
+
+    def update(self, done, total, metrics):
+        if done > 1 and done % self.every == 0:
+            print("[INFO] processed {}/{}".format(done, total))
+
+    def finish(self, metrics):
+        pass
+
+class JSONReporter:
+    def __init__(self, path):
+        # write the summary to a JSON file once loading is done
+        self.path = path
+
+    def update(self, done, total, metrics):
+        pass
+
+    def finish(self, metrics):
+        metrics.to_json(self.path)
+
+class LoaderMetrics:
+    def __init__(self, reporters=None, traceMemory=False):
+        # wall time, calls and the largest output array of every stage
+        # (reading/decoding, label parsing and each preprocessor), along
+        # with the images loaded and bytes read; `traceMemory` also
+        # tracks the peak of all NumPy allocations made while loading
+        # (through `tracemalloc`, which slows Python code down noticeably)
+        self.reporters = [] if reporters is None else reporters
+        self.traceMemory = traceMemory
+        self.reset()
+
+    def reset(self):
+        self.stages = {}
+        self.images = 0
+        self.bytesRead = 0
+        self.seconds = 0.0
+        self.peakTracedBytes = None
+        self.started = None
+
+    def begin(self):
+        self.started = time.perf_counter()
+        if self.traceMemory:
+            tracemalloc.start()
+
+    def add(self, stage, seconds, nbytes=0, calls=1):
+        # accumulate a stage's time and keep its largest output array
+        s = self.stages.get(stage)
+        if s is None:
+            s = self.stages[stage] = {"calls": 0, "seconds": 0.0, "peakBytes": 0}
+
+        s["calls"] += calls
+        s["seconds"] += seconds
+        s["peakBytes"] = max(s["peakBytes"], nbytes)
+
+    def record(self, samples, bytesRead):
+        # record one image: its (stage, seconds, output bytes) samples and
+        # the number of encoded bytes read for it
+        for (stage, seconds, nbytes) in samples:
+            self.add(stage, seconds, nbytes)
+
+        self.images += 1
+        self.bytesRead += bytesRead
+
+    def update(self, done, total):
+        for reporter in self.reporters:
+            reporter.update(done, total, self)
+
+    def finish(self):
+        if self.started is not None:
+            self.seconds += time.perf_counter() - self.started
+            self.started = None
+
+        if self.traceMemory and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            self.peakTracedBytes = max(self.peakTracedBytes or 0, peak)
+            tracemalloc.stop()
+
+        for reporter in self.reporters:
+            reporter.finish(self)
+
+    def summary(self):
+        # the totals, throughput and a per-stage breakdown (stage times
+        # are summed over the workers, so with several workers they can
+        # add up to more than the wall time)
+        staged = sum(s["seconds"] for s in self.stages.values()) or 1.0
+        stages = {}
+
+        for (name, s) in self.stages.items():
+            stages[name] = dict(s, meanMs=1000.0 * s["seconds"] / max(s["calls"], 1),
+                share=s["seconds"] / staged)
+
+        return {
+            "images": self.images,
+            "seconds": self.seconds,
+            "imagesPerSecond": self.images / self.seconds if self.seconds > 0 else None,
+            "bytesRead": self.bytesRead,
+            "peakTracedBytes": self.peakTracedBytes,
+            "stages": stages,
+        }
+
+    def to_json(self, path=None, indent=2):
+        # the summary as a JSON string, also written to `path` when given
+        text = json.dumps(self.summary(), indent=indent)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+
+        return text
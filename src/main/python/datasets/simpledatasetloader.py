@@ -1,29 +1,375 @@
 import numpy as np
 import cv2
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from .imagesize import image_size
+from .imagesize import reduced_flag
+from .loadermetrics import ProgressReporter
 
 class SimpleDatasetLoader:
-    def __init__(self, preprocessors=None):
+    def __init__(self, preprocessors=None, workers=1, executor="thread",
+        cache=None, reducedDecode=False, fetcher=None, metrics=None):
         self.preprocessors = preprocessors
         if self.preprocessors is None:
             self.preprocessors = []
-    
-    def load(self, imagePaths, verbose=-1):
-        data = []
+
+        # the number of workers used to decode and preprocess images
+        # (-1 uses all available cores) along with the kind of pool to
+        # run them in -- "thread" works well since cv2 releases the GIL,
+        # "process" sidesteps it entirely for pure Python preprocessors
+        self.workers = workers
+        self.executor = executor
+
+        # an optional DatasetCache used to persist the preprocessed
+        # dataset between runs
+        self.cache = cache
+
+        # when the first preprocessor resizes to a known target size, the
+        # images can be decoded at a reduced resolution (1/2, 1/4 or 1/8,
+        # which JPEG decoders produce almost for free) that is still at
+        # least as large as the target
+        self.decodeSize = self._target_size() if reducedDecode else None
+
+        # an optional URLFetcher, in which case the "paths" are URLs that
+        # are downloaded and decoded in memory (the worker pool then bounds
+        # the number of concurrent downloads along with the fetcher's own
+        # per-host limit) -- the fetcher's connection pools and byte budget
+        # are shared through memory, so fetching needs a thread pool
+        if fetcher is not None and executor == "process":
+            raise ValueError("a fetcher can only be used with the thread executor")
+        self.fetcher = fetcher
+
+        # an optional LoaderMetrics recording the time spent in every stage
+        # (when None, the images are loaded without any timing at all)
+        self.metrics = metrics
+
+    def _target_size(self):
+        # look for the (width, height) of the first preprocessor, looking
+        # inside pipelines for their own first preprocessor
+        p = self.preprocessors[0] if len(self.preprocessors) > 0 else None
+        while p is not None and not hasattr(p, "width"):
+            chain = getattr(p, "preprocessors", None)
+            p = chain[0] if chain else None
+
+        return None if p is None else (p.width, p.height)
+
+    def _read_image(self, imagePath):
+        if self.fetcher is not None:
+            return self.fetcher.fetch_image(imagePath, self.decodeSize)
+
+        if self.decodeSize is None:
+            return cv2.imread(imagePath)
+
+        # read the encoded bytes once, peek at the dimensions in the
+        # header, and decode straight from memory at the smallest
+        # sufficient scale
+        data = np.fromfile(imagePath, dtype="uint8")
+        flag = reduced_flag(image_size(data), self.decodeSize)
+        return cv2.imdecode(data, flag)
+
+    def _label(self, imagePath):
+        # extract the class label assuming that our path has the following
+        # format: /path/to/dataset/{class}/{image}.jpg (or
+        # http://host/dataset/{class}/{image}.jpg for URLs)
+        sep = "/" if self.fetcher is not None else os.path.sep
+        return imagePath.split(sep)[-2]
+
+    def _load_image(self, imagePath, label=None):
+        # load the image and extract the class label (unless it is already
+        # known from a manifest)
+        image = self._read_image(imagePath)
+        if label is None:
+            label = self._label(imagePath)
+
+        # loop over the preprocessors and apply each to the image
+        for p in self.preprocessors:
+            image = p.preprocess(image)
+
+        return (image, label)
+
+    def _load_image_timed(self, imagePath, label=None):
+        # the same as `_load_image`, timing every stage along the way --
+        # the samples are returned rather than recorded here, so they make
+        # it back from worker processes too
+        start = time.perf_counter()
+        image = self._read_image(imagePath)
+        now = time.perf_counter()
+        samples = [("read", now - start, image.nbytes)]
+
+        if label is None:
+            label = self._label(imagePath)
+        (start, now) = (now, time.perf_counter())
+        samples.append(("label", now - start, 0))
+
+        for (i, p) in enumerate(self.preprocessors):
+            image = p.preprocess(image)
+            (start, now) = (now, time.perf_counter())
+            samples.append(("preprocess/{}/{}".format(i, type(p).__name__),
+                now - start, image.nbytes))
+
+        # downloads are counted by the fetcher itself
+        bytesRead = os.path.getsize(imagePath) if self.fetcher is None else 0
+        return (image, label, samples, bytesRead)
+
+    def _record(self, results):
+        for (image, label, samples, bytesRead) in results:
+            self.metrics.record(samples, bytesRead)
+            yield (image, label)
+
+    def _begin_metrics(self):
+        if self.metrics is None:
+            return None
+
+        self.metrics.begin()
+        return self.fetcher.bytesFetched if self.fetcher is not None else 0
+
+    def _finish_metrics(self, fetched):
+        if self.metrics is None:
+            return
+
+        if self.fetcher is not None:
+            self.metrics.bytesRead += self.fetcher.bytesFetched - fetched
+        self.metrics.finish()
+
+    def _resolve_workers(self, workers):
+        # resolve the number of workers, where -1 (or 0) uses all cores
+        workers = self.workers if workers is None else workers
+        if workers is None or workers < 1:
+            workers = os.cpu_count() or 1
+
+        return workers
+
+    def _make_pool(self, workers):
+        # a single worker runs serially without any pool at all
+        if workers == 1:
+            return None
+
+        if self.executor == "thread":
+            return ThreadPoolExecutor(max_workers=workers)
+        elif self.executor == "process":
+            return ProcessPoolExecutor(max_workers=workers)
+
+        raise ValueError("unknown executor: {}".format(self.executor))
+
+    def _map_images(self, pool, imagePaths, workers, labels=None):
+        # only take the timed path when someone is listening
+        if self.metrics is not None:
+            return self._record(self._map_loads(pool, imagePaths, workers,
+                self._load_image_timed, labels))
+
+        return self._map_loads(pool, imagePaths, workers, self._load_image,
+            labels)
+
+    def _map_loads(self, pool, imagePaths, workers, load, labels=None):
+        # the labels (if given) are handed to the loads along with the
+        # paths, so they are not parsed out of every path again
+        args = (imagePaths,) if labels is None else (imagePaths, labels)
+        if pool is None:
+            return map(load, *args)
+
+        # hand out the paths to a process pool in chunks so the per-task
+        # pickling overhead is amortized over several images
+        chunksize = 1
+        if isinstance(pool, ProcessPoolExecutor):
+            chunksize = max(1, min(64,
+                len(imagePaths) // (workers * 4)))
+
+        # `map` yields the results in the same order as the input paths,
+        # so the output matches the serial path exactly
+        return pool.map(load, *args, chunksize=chunksize)
+
+    def _iter_images(self, imagePaths, workers, labels=None):
+        pool = self._make_pool(workers)
+
+        try:
+            for result in self._map_images(pool, imagePaths, workers, labels):
+                yield result
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def iter_batches(self, imagePaths, batchSize, workers=None, prefetch=1):
+        workers = self._resolve_workers(workers)
+
+        # a DatasetManifest already knows the label of every image
+        names = None
+        if hasattr(imagePaths, "image_paths"):
+            names = imagePaths.classes[imagePaths.labels]
+            imagePaths = imagePaths.image_paths()
+
+        # the batch buffers are allocated once (as soon as the first image
+        # tells us its shape) and recycled -- `prefetch` batches are decoded
+        # in the background while the caller works on the current one, so
+        # memory stays bounded at (prefetch + 1) batches. NOTE: a yielded
+        # batch is only valid until the next one is requested
+        buffers = [None] * (prefetch + 1)
+        free = queue.Queue()
+        ready = queue.Queue()
+
+        for idx in range(len(buffers)):
+            free.put(idx)
+
+        def produce():
+            pool = self._make_pool(workers)
+
+            try:
+                for start in range(0, len(imagePaths), batchSize):
+                    # wait for a free buffer (a negative index means the
+                    # caller stopped iterating)
+                    idx = free.get()
+                    if idx < 0:
+                        return
+
+                    batchPaths = imagePaths[start:start + batchSize]
+                    batchNames = None if names is None else \
+                        names[start:start + batchSize]
+                    labels = []
+
+                    for (i, (image, label)) in enumerate(self._map_images(
+                        pool, batchPaths, workers, batchNames)):
+                        if buffers[idx] is None:
+                            buffers[idx] = np.empty((batchSize,) + image.shape,
+                                dtype=image.dtype)
+
+                        if image.shape != buffers[idx].shape[1:]:
+                            raise ValueError("image {} has shape {}, expected {}".format(
+                                batchPaths[i], image.shape, buffers[idx].shape[1:]))
+
+                        buffers[idx][i] = image
+                        labels.append(label)
+
+                    ready.put((idx, len(batchPaths), np.array(labels)))
+
+                ready.put(None)
+            except Exception as e:
+                ready.put(e)
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+
+        fetched = self._begin_metrics()
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        held = None
+
+        try:
+            while True:
+                # hand the buffer of the previous batch back to the producer
+                if held is not None:
+                    free.put(held)
+                    held = None
+
+                item = ready.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                (held, n, labels) = item
+                yield (buffers[held][:n], labels)
+        finally:
+            free.put(-1)
+            self._finish_metrics(fetched)
+
+    def load(self, imagePaths, verbose=-1, workers=None, encodeLabels=False):
+        fetched = self._begin_metrics()
+
+        try:
+            return self._load_cached(imagePaths, verbose, workers, encodeLabels)
+        finally:
+            self._finish_metrics(fetched)
+
+    def _load_cached(self, imagePaths, verbose, workers, encodeLabels):
+        # the images may be given as a DatasetManifest rather than a list
+        # of paths, which lets a cache built with `trustManifest` skip
+        # stat'ing every file and takes the labels from the manifest
+        manifest = imagePaths if hasattr(imagePaths, "image_paths") else None
+        if manifest is not None:
+            imagePaths = manifest.image_paths()
+
+        # without a cache, simply decode the whole dataset
+        if self.cache is None:
+            return self._load(imagePaths, verbose, workers, encodeLabels,
+                manifest)
+
+        # otherwise check if the same images have already been run
+        # through the same preprocessors, and if not, decode them once and
+        # persist the result -- either way the data comes back memory mapped
+        start = time.perf_counter()
+        key = self.cache.key(imagePaths if manifest is None else manifest,
+            self.preprocessors, options={"decodeSize": self.decodeSize})
+        entry = self.cache.get(key)
+
+        if entry is None:
+            (data, labels, classes) = self._load(imagePaths, verbose, workers,
+                encodeLabels=True, manifest=manifest)
+            entry = self.cache.put(key, data, labels, classes)
+        else:
+            if self.metrics is not None:
+                self.metrics.add("cache", time.perf_counter() - start,
+                    entry[0].nbytes)
+                self.metrics.images += len(imagePaths)
+            if verbose > 0:
+                print("[INFO] loaded {} images from cache".format(len(imagePaths)))
+
+        (data, labels, classes) = entry
+
+        if not encodeLabels:
+            return (data, classes[labels])
+
+        return (data, labels, classes)
+
+    def _load(self, imagePaths, verbose=-1, workers=None, encodeLabels=False,
+        manifest=None):
+        data = None
         labels = []
 
-        for (i, imagePath) in enumerate(imagePath):
-            image = cv2.imread(imagePath)
-            label = imagePath.split(os.path.sep)[-2]
+        workers = self._resolve_workers(workers)
+        results = self._iter_images(imagePaths, workers,
+            None if manifest is None else manifest.labels)
 
-            if self.preprocessors is not None:
-                for p in self.preprocessors:
-                    image = p.preprocess(image)
-            
-            data.append(image)
+        # the classic `verbose` progress print is just the default reporter
+        progress = ProgressReporter(verbose) if verbose > 0 else None
+
+        for (i, (image, label)) in enumerate(results):
+            # the first image tells us the (fixed) output shape of the
+            # preprocessors, so allocate one contiguous array for the
+            # whole dataset and write every image directly into its slot
+            if data is None:
+                data = np.empty((len(imagePaths),) + image.shape,
+                    dtype=image.dtype)
+
+            if image.shape != data.shape[1:]:
+                raise ValueError("image {} has shape {}, expected {}".format(
+                    imagePaths[i], image.shape, data.shape[1:]))
+
+            data[i] = image
             labels.append(label)
 
-            if verbose > 0  and i > 0 and (i + 1) % verbose == 0:
-                print("[INFO] processed {}/{}".format(i + 1, len(imagePaths)))
+            if progress is not None:
+                progress.update(i + 1, len(imagePaths), self.metrics)
+            if self.metrics is not None:
+                self.metrics.update(i + 1, len(imagePaths))
+
+        if data is None:
+            data = np.empty((0,), dtype="uint8")
+
+        # a manifest has the labels encoded already
+        if manifest is not None:
+            if not encodeLabels:
+                return (data, manifest.classes[manifest.labels])
+
+            return (data, manifest.labels, manifest.classes)
+
+        if not encodeLabels:
+            return (data, np.array(labels))
+
+        # encode the labels as compact integers along with the (sorted)
+        # table of class names they index into
+        (classes, labels) = np.unique(np.array(labels), return_inverse=True)
+        labels = labels.astype(np.min_scalar_type(max(len(classes) - 1, 0)))
 
-        return (np.array(data), np.array(labels))
\ No newline at end of file
+        return (data, labels, classes)
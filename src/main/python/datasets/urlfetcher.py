@@ -0,0 +1,195 @@
+import numpy as np
+import cv2
+import http.client
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+from .imagesize import image_size
+from .imagesize import reduced_flag
+
+# the statuses worth retrying (everything else is final)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+class ByteBudget:
+    def __init__(self, limit):
+        # a counting semaphore over bytes, bounding the encoded image data
+        # held by all in-flight downloads at once
+        self.limit = limit
+        self.used = 0
+        self.cond = threading.Condition()
+
+    def acquire(self, n, block=True):
+        # a single request larger than the whole budget is still let
+        # through once nothing else is in flight
+        with self.cond:
+            while block and self.used > 0 and self.used + n > self.limit:
+                self.cond.wait()
+            self.used += n
+
+    def release(self, n):
+        with self.cond:
+            self.used -= n
+            self.cond.notify_all()
+
+class URLFetcher:
+    def __init__(self, perHost=8, retries=3, backoff=0.5, timeout=10.0,
+        maxInFlight=64 * 1024 * 1024, maxRedirects=5):
+        # the fetcher is thread-safe and meant to be shared by a pool of
+        # workers (e.g. the one of a SimpleDatasetLoader): at most
+        # `perHost` requests run against the same host at once, each over
+        # a kept-alive connection taken from that host's pool
+        self.perHost = perHost
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.maxRedirects = maxRedirects
+        self.budget = ByteBudget(maxInFlight)
+
+        # the total number of body bytes downloaded so far
+        self.bytesFetched = 0
+
+        self.lock = threading.Lock()
+        self.slots = {}
+        self.idle = {}
+
+    def _host(self, parts):
+        # connections are pooled per (scheme, host, port)
+        host = (parts.scheme, parts.hostname, parts.port)
+        with self.lock:
+            if host not in self.slots:
+                self.slots[host] = threading.BoundedSemaphore(self.perHost)
+                self.idle[host] = []
+
+        return host
+
+    def _connect(self, host):
+        # reuse an idle connection to the host when there is one
+        with self.lock:
+            if len(self.idle[host]) > 0:
+                return self.idle[host].pop()
+
+        (scheme, hostname, port) = host
+        if scheme == "https":
+            return http.client.HTTPSConnection(hostname, port,
+                timeout=self.timeout)
+        elif scheme == "http":
+            return http.client.HTTPConnection(hostname, port,
+                timeout=self.timeout)
+
+        raise ValueError("unsupported URL scheme: {}".format(scheme))
+
+    def _request(self, url):
+        # issue a single GET and read the whole body, returning the status,
+        # the response headers and the body along with its reserved size
+        parts = urlsplit(url)
+        host = self._host(parts)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        with self.slots[host]:
+            conn = self._connect(host)
+
+            try:
+                conn.request("GET", target)
+                response = conn.getresponse()
+
+                # reserve the announced size before reading the body; a
+                # chunked response is accounted for once it has been read
+                length = response.getheader("Content-Length")
+                reserved = int(length) if length is not None else 0
+                self.budget.acquire(reserved)
+
+                try:
+                    body = response.read()
+                except BaseException:
+                    self.budget.release(reserved)
+                    raise
+
+                if len(body) != reserved:
+                    self.budget.acquire(len(body) - reserved, block=False)
+            except BaseException:
+                conn.close()
+                raise
+
+            # the body has been read in full, so the connection can go
+            # back to the pool unless the server asked to close it
+            if response.will_close:
+                conn.close()
+            else:
+                with self.lock:
+                    self.idle[host].append(conn)
+
+        return (response.status, response.headers, body)
+
+    def _fetch(self, url):
+        # fetch the body of the URL, following redirects and retrying
+        # transient failures with an exponential backoff; the caller must
+        # release the body's size from the budget once done with it
+        for attempt in range(self.retries + 1):
+            try:
+                for _ in range(self.maxRedirects + 1):
+                    (status, headers, body) = self._request(url)
+                    if status not in REDIRECT_STATUSES:
+                        break
+
+                    self.budget.release(len(body))
+                    url = urljoin(url, headers["Location"])
+            except (OSError, http.client.HTTPException) as e:
+                error = e
+            else:
+                # a redirect loop is final, retrying would only loop again
+                # (the last redirect's body has already been released)
+                if status in REDIRECT_STATUSES:
+                    raise IOError("too many redirects: {}".format(url))
+
+                if status == 200:
+                    with self.lock:
+                        self.bytesFetched += len(body)
+                    return body
+
+                self.budget.release(len(body))
+                error = IOError("HTTP {} for {}".format(status, url))
+                if status not in RETRY_STATUSES:
+                    raise error
+
+            if attempt < self.retries:
+                time.sleep(self.backoff * (2 ** attempt))
+
+        raise error
+
+    def fetch(self, url):
+        # return the raw bytes of the URL
+        body = self._fetch(url)
+        self.budget.release(len(body))
+        return body
+
+    def fetch_image(self, url, decodeSize=None):
+        # download the encoded image and decode it straight from memory
+        # (optionally at the smallest reduced scale still covering
+        # `decodeSize`), so nothing ever touches the disk
+        body = self._fetch(url)
+
+        try:
+            data = np.frombuffer(body, dtype="uint8")
+            flag = cv2.IMREAD_COLOR
+            if decodeSize is not None:
+                flag = reduced_flag(image_size(data), decodeSize)
+
+            image = cv2.imdecode(data, flag)
+        finally:
+            self.budget.release(len(body))
+
+        if image is None:
+            raise IOError("could not decode image from {}".format(url))
+
+        return image
+
+    def close(self):
+        # close every idle connection
+        with self.lock:
+            for conns in self.idle.values():
+                for conn in conns:
+                    conn.close()
+                del conns[:]
@@ -0,0 +1,11 @@
+from .convolution import convolve
+from .convolution import correlate
+from .kernels import kernelBank
+from .morphology import erode
+from .morphology import dilate
+from .morphology import morphology_ex
+from .filterbank import filter_bank
+from .bilateral import bilateral_grid
+from .bilateral import psnr
+from .median import median_filter
+from .tiling import tiled_apply
\ No newline at end of file
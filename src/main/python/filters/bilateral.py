@@ -0,0 +1,127 @@
+# import the necessary packages
+import numpy as np
+import cv2
+
+def psnr(image, reference):
+    # peak signal-to-noise ratio (in dB) of the image against a reference,
+    # using the largest value of the reference's data type as the peak
+    peak = np.iinfo(reference.dtype).max if reference.dtype.kind in "ui" else 1.0
+    mse = np.mean((image.astype("float64") - reference.astype("float64")) ** 2)
+    if mse == 0:
+        return float("inf")
+
+    return 10 * np.log10(peak ** 2 / mse)
+
+def gaussian_taps(sigma):
+    # a normalized 1-D Gaussian sampled out to two standard deviations
+    radius = max(1, int(np.ceil(2 * sigma)))
+    x = np.arange(-radius, radius + 1)
+    taps = np.exp(-(x ** 2) / (2.0 * sigma ** 2))
+    return taps / taps.sum()
+
+def blur_axis(grid, taps, axis):
+    # convolve the (small) grid along one axis, treating everything past
+    # the edges as empty cells
+    radius = len(taps) // 2
+    n = grid.shape[axis]
+    shape = list(grid.shape)
+    shape[axis] += 2 * radius
+    padded = np.zeros(shape, dtype=grid.dtype)
+    window = [slice(None)] * grid.ndim
+
+    window[axis] = slice(radius, radius + n)
+    padded[tuple(window)] = grid
+
+    output = np.zeros_like(grid)
+    scratch = np.empty_like(grid)
+    for (i, t) in enumerate(taps.astype(grid.dtype)):
+        window[axis] = slice(i, i + n)
+        np.multiply(padded[tuple(window)], t, out=scratch)
+        output += scratch
+
+    return output
+
+def bilateral_channel(channel, sigmaColor, sigmaSpace, quality):
+    (h, w) = channel.shape
+    values = channel.astype("float32")
+
+    # the grid samples space every sigmaSpace / quality pixels and
+    # intensity every sigmaColor / quality levels, and is then blurred by
+    # a Gaussian of `quality` cells -- so the cost of the blur does not
+    # depend on the spatial sigma at all (a larger sigma just means a
+    # coarser grid), and a higher quality trades speed for accuracy
+    (cellS, cellR) = (sigmaSpace / quality, sigmaColor / quality)
+    taps = gaussian_taps(quality)
+    pad = len(taps) // 2 + 1
+    low = values.min()
+
+    # pixel (x, y) sits at grid cell ((x + 0.5 + off) / cellS - 0.5, ...),
+    # the mapping `cv2.resize` uses when scaling the grid up by cellS, so
+    # the slicing below can resample the grid with it; the margin of `off`
+    # pixels keeps `pad` empty cells around the image for the blur
+    off = int(np.ceil(pad * cellS))
+    gy = ((np.arange(h, dtype="float32") + 0.5 + off) / cellS - 0.5)[:, np.newaxis]
+    gx = ((np.arange(w, dtype="float32") + 0.5 + off) / cellS - 0.5)[np.newaxis, :]
+    gz = (values - low) / cellR + pad
+
+    gH = int(np.floor(gy.max())) + 2 + pad
+    gW = int(np.floor(gx.max())) + 2 + pad
+    gZ = int(np.floor(gz.max())) + 2 + pad
+
+    # splat: accumulate every pixel (and a unit weight) into its nearest
+    # grid cell with a single `bincount`
+    cell = ((np.rint(gy).astype("int64") * gW + np.rint(gx).astype("int64"))
+        * gZ + np.rint(gz).astype("int64")).ravel()
+    size = gH * gW * gZ
+    grid = np.stack([
+        np.bincount(cell, weights=values.ravel(), minlength=size),
+        np.bincount(cell, minlength=size)], axis=-1)
+    grid = grid.reshape((gH, gW, gZ, 2)).astype("float32")
+
+    # blur the grid along all three axes
+    for axis in range(3):
+        grid = blur_axis(grid, taps, axis)
+
+    # slice: trilinearly interpolate the blurred grid at every pixel and
+    # normalize the accumulated values by the accumulated weights. The
+    # interpolation is separable, so rather than gathering the 8 corner
+    # cells of every pixel, every intensity slice of the grid is scaled
+    # up to the frame with a bilinear `cv2.resize` and then weighed into
+    # the pixels whose intensity lies within one cell of it -- a few
+    # streaming passes over the frame per intensity cell
+    (acc, norm) = (np.zeros((h, w), dtype="float32"),
+        np.zeros((h, w), dtype="float32"))
+    weight = np.empty((h, w), dtype="float32")
+    crop = (slice(off, off + h), slice(off, off + w))
+
+    for z in range(int(np.floor(gz.min())), int(np.floor(gz.max())) + 2):
+        planes = [cv2.resize(np.ascontiguousarray(grid[:, :, z, c]), None,
+            fx=cellS, fy=cellS, interpolation=cv2.INTER_LINEAR)[crop]
+            for c in (0, 1)]
+
+        # the linear "tent" weight of the slice, max(1 - |gz - z|, 0)
+        cv2.absdiff(gz, float(z), dst=weight)
+        cv2.subtract(1.0, weight, dst=weight)
+        cv2.max(weight, 0.0, dst=weight)
+        cv2.accumulateProduct(planes[0], weight, acc)
+        cv2.accumulateProduct(planes[1], weight, norm)
+
+    return acc / np.maximum(norm, 1e-6)
+
+def bilateral_grid(image, sigmaColor, sigmaSpace, quality=1.0):
+    # approximate `cv2.bilateralFilter` with a bilateral grid (Chen, Paris
+    # and Durand); color images are filtered one channel at a time. The
+    # cost grows with the number of intensity cells (255 / sigmaColor *
+    # quality) rather than with the diameter, so it pays off for the wide
+    # spatial sigmas -- a small diameter is still faster done exactly
+    if image.ndim == 2:
+        output = bilateral_channel(image, sigmaColor, sigmaSpace, quality)
+    else:
+        output = np.stack([bilateral_channel(image[:, :, c], sigmaColor,
+            sigmaSpace, quality) for c in range(image.shape[2])], axis=-1)
+
+    if image.dtype.kind in "ui":
+        info = np.iinfo(image.dtype)
+        output = np.clip(np.rint(output), info.min, info.max)
+
+    return output.astype(image.dtype)
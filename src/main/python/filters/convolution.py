@@ -0,0 +1,159 @@
+# import the necessary packages
+import numpy as np
+import cv2
+
+def pad_image(image, kH, kW):
+    # "pad" the borders of the input image by replicating the edge
+    # pixels so the spatial size (i.e., width and height) is not
+    # reduced -- the anchor sits at the kernel center, just like
+    # OpenCV's `filter2D`
+    (top, left) = (kH // 2, kW // 2)
+    return cv2.copyMakeBorder(image, top, kH - 1 - top, left, kW - 1 - left,
+        cv2.BORDER_REPLICATE)
+
+# `cv2.filter2D` switches to a DFT for kernels with this many taps
+FILTER2D_TAPS = 50
+
+def convolve_direct(padded, kernel, oH, oW, dtype="float32"):
+    # small kernels go through `cv2.filter2D` in the accumulator type,
+    # anchored at the top-left tap so it correlates the already padded
+    # image (the border it adds itself is cropped away) -- below
+    # FILTER2D_TAPS it sums in the spatial domain, giving the very same
+    # values as the shift-and-add loop below at a fraction of the cost
+    channels = padded.shape[2] if padded.ndim == 3 else 1
+    if kernel.size < FILTER2D_TAPS and channels <= 4:
+        output = cv2.filter2D(np.ascontiguousarray(padded, dtype=dtype), -1,
+            np.asarray(kernel, dtype=dtype), anchor=(0, 0),
+            borderType=cv2.BORDER_CONSTANT)
+        return output[:oH, :oW].reshape((oH, oW) + padded.shape[2:])
+
+    # allocate the accumulator along with a scratch buffer so
+    # no temporaries are created inside the loop
+    output = np.zeros((oH, oW) + padded.shape[2:], dtype=dtype)
+    scratch = np.empty_like(output)
+
+    # rather than sliding the kernel over every (x, y)-coordinate, slide
+    # the *image* under every kernel tap: each tap contributes a shifted
+    # view of the padded image scaled by its weight, so the whole image
+    # is processed by a handful of vectorized operations (taps with a
+    # zero weight, like the center column of Sobel-x, are skipped)
+    for (y, x) in zip(*np.nonzero(kernel)):
+        np.multiply(padded[y:y + oH, x:x + oW], padded.dtype.type(kernel[y, x]),
+            out=scratch)
+        output += scratch
+
+    return output
+
+def convolve_separable(padded, col, row, oH, oW, dtype="float32"):
+    # a rank-1 kernel is the outer product of a column and a row vector,
+    # so it can be applied as a vertical pass followed by a horizontal
+    # one, costing kH + kW operations per pixel instead of kH * kW
+    vertical = convolve_direct(padded, col.reshape((-1, 1)), oH,
+        padded.shape[1], dtype=dtype)
+    return convolve_direct(vertical, row.reshape((1, -1)), oH, oW,
+        dtype=dtype)
+
+def convolve_fft(padded, kernel, oH, oW, dtype="float32"):
+    # correlating with the kernel is convolving with the kernel flipped
+    # along both axes, which is a pointwise product in the frequency
+    # domain -- the cost no longer depends on the size of the kernel.
+    # Pad up to a size OpenCV deems fast for the DFT; since the padded
+    # image already holds the kernel margins, the wrap-around of the
+    # circular convolution never reaches the region we keep
+    (kH, kW) = kernel.shape[:2]
+    shape = (cv2.getOptimalDFTSize(padded.shape[0]),
+        cv2.getOptimalDFTSize(padded.shape[1]))
+    kernel = kernel[::-1, ::-1].astype(dtype)
+    if padded.ndim == 3:
+        kernel = kernel[:, :, np.newaxis]
+
+    spectrum = np.fft.rfft2(padded, s=shape, axes=(0, 1))
+    spectrum *= np.fft.rfft2(kernel, s=shape, axes=(0, 1))
+    output = np.fft.irfft2(spectrum, s=shape, axes=(0, 1))
+
+    return output[kH - 1:kH - 1 + oH, kW - 1:kW - 1 + oW].astype(dtype)
+
+def separate_kernel(kernel, tol=1e-6):
+    # use the singular value decomposition to check whether the kernel
+    # is (numerically) rank-1 -- box, Sobel and Gaussian kernels all are
+    # -- and if so return its column and row factors
+    (u, s, vt) = np.linalg.svd(np.asarray(kernel, dtype="float64"))
+    if len(s) > 1 and s[1] > tol * s[0]:
+        return None
+
+    scale = np.sqrt(s[0])
+    return (u[:, 0] * scale, vt[0] * scale)
+
+def choose_method(kernel, fftTaps=64):
+    # estimate the per-pixel cost of every strategy: direct convolution
+    # touches every nonzero tap, the separable path kH + kW taps, and the
+    # FFT path a roughly constant amount once the kernel is large
+    (kH, kW) = kernel.shape[:2]
+    taps = np.count_nonzero(kernel)
+
+    if kH > 1 and kW > 1 and kH + kW < taps and \
+        separate_kernel(kernel) is not None:
+        return "separable"
+
+    if taps > fftTaps:
+        return "fft"
+
+    return "direct"
+
+def accumulator_dtype(kernel):
+    # integer-valued kernels (sharpen, Laplacian, Sobel) are exact in
+    # float32 for 8-bit images, while fractional kernels (e.g. box blurs)
+    # are accumulated in float64 so the truncation to uint8 gives the
+    # very same pixels as summing every ROI in double precision
+    if np.array_equal(kernel, np.round(kernel)):
+        return np.dtype("float32")
+
+    return np.dtype("float64")
+
+def correlate_padded(padded, kernel, oH, oW, dtype="float32", method="auto"):
+    # pick the cheapest strategy for the kernel unless the caller
+    # explicitly asked for one; the separable and FFT paths agree with
+    # the direct path to within 1e-4 (float32) or 1e-9 (float64) of the
+    # kernel's absolute sum times the largest pixel value, which after
+    # the uint8 truncation in `convolve` means at most one gray level
+    if method == "auto":
+        method = choose_method(kernel)
+
+    if method == "direct":
+        return convolve_direct(padded, kernel, oH, oW, dtype=dtype)
+    elif method == "separable":
+        factors = separate_kernel(kernel)
+        if factors is None:
+            raise ValueError("kernel is not separable")
+        return convolve_separable(padded, factors[0], factors[1], oH, oW,
+            dtype=dtype)
+    elif method == "fft":
+        return convolve_fft(padded, kernel, oH, oW, dtype=dtype)
+
+    raise ValueError("unknown convolution method: {}".format(method))
+
+def correlate(image, kernel, dtype=None, method="auto"):
+    # grab the spatial dimensions of the image, along with
+    # the spatial dimensions of the kernel
+    (iH, iW) = image.shape[:2]
+    (kH, kW) = kernel.shape[:2]
+    dtype = accumulator_dtype(kernel) if dtype is None else np.dtype(dtype)
+
+    # pad the image once and convert it to the accumulator type, then
+    # compute the raw response (one output channel per input channel)
+    padded = pad_image(image, kH, kW).astype(dtype)
+    if image.ndim == 3 and padded.ndim == 2:
+        padded = padded[:, :, np.newaxis]
+
+    return correlate_padded(padded, kernel, iH, iW, dtype, method)
+
+def convolve(image, kernel, dtype=None, method="auto"):
+    output = correlate(image, kernel, dtype=dtype,
+        method=method).astype("float32")
+
+    # clip the output image to the range [0, 255] (the same pixels the
+    # original `rescale_intensity(in_range=(0, 255))` * 255 gave)
+    output = np.clip(output, 0, 255, out=output).astype("uint8")
+
+    # return the output image
+    return output
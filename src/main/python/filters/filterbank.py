@@ -0,0 +1,86 @@
+# import the necessary packages
+import numpy as np
+import cv2
+from .convolution import FILTER2D_TAPS
+from .convolution import pad_image
+from .convolution import accumulator_dtype
+from .convolution import choose_method
+from .convolution import separate_kernel
+from .convolution import correlate_padded
+
+def filter_bank(image, kernels, dtype=None, out=None):
+    # stack the raw responses of every kernel of a bank -- each kernel
+    # still makes its own pass over the image, the bank only spares the
+    # allocations, type conversions and padding of separate `correlate`
+    # calls. Accept either a bare sequence of kernels or a bank of
+    # (name, kernel) pairs like `kernelBank`
+    kernels = [k[1] if isinstance(k, tuple) else k for k in kernels]
+    kernels = [np.asarray(k) for k in kernels]
+    (iH, iW) = image.shape[:2]
+    channels = image.shape[2] if image.ndim == 3 else 1
+
+    # accumulate in float32 unless one of the kernels needs float64 to
+    # reproduce the double precision sums (see `accumulator_dtype`)
+    if dtype is None:
+        dtype = max([accumulator_dtype(k) for k in kernels],
+            key=lambda d: d.itemsize)
+    dtype = np.dtype(dtype)
+
+    # the responses of a video are best written into the same (K, H, W[, C])
+    # output frame after frame, sparing the allocation of a fresh one
+    shape = (len(kernels), iH, iW) + image.shape[2:]
+    if out is not None and (out.shape != shape or out.dtype != dtype or
+        not out.flags.c_contiguous):
+        raise ValueError("out must be a contiguous {} array of shape {}".format(
+            dtype, shape))
+    output = np.empty(shape, dtype=dtype) if out is None else out
+    depth = cv2.CV_64F if dtype == np.float64 else cv2.CV_32F
+
+    # the kernels OpenCV can apply exactly as we would are handed to it
+    # straight away: it reads the 8-bit image itself (replicating the
+    # border around the centered anchor, just like `pad_image`) and writes
+    # every response right into its slot of the output, so no padded float
+    # copy of the image and no intermediate result is ever made for them.
+    # Below FILTER2D_TAPS `cv2.filter2D` sums in the spatial domain, giving
+    # the very same values as `correlate`; `cv2.sepFilter2D` runs the two
+    # passes of a separable kernel in the other order, which stays within
+    # the tolerance of the separable path (see `correlate_padded`)
+    rest = []
+    for (i, kernel) in enumerate(kernels):
+        method = choose_method(kernel)
+        if channels > 4 or method == "fft" or (method == "direct" and
+            kernel.size >= FILTER2D_TAPS):
+            rest.append(i)
+            continue
+
+        dst = output[i].reshape((iH, iW) + ((channels,) if channels > 1 else ()))
+        if method == "separable":
+            (col, row) = separate_kernel(kernel)
+            cv2.sepFilter2D(image.reshape(dst.shape), depth, row.astype(dtype),
+                col.astype(dtype), dst=dst, borderType=cv2.BORDER_REPLICATE)
+        else:
+            cv2.filter2D(image.reshape(dst.shape), depth, kernel.astype(dtype),
+                dst=dst, borderType=cv2.BORDER_REPLICATE)
+
+    if len(rest) == 0:
+        return output
+
+    # pad the image once for the largest remaining kernel -- every kernel
+    # then reads its neighborhood at an offset inside that shared margin
+    (mH, mW) = (max(kernels[i].shape[0] for i in rest),
+        max(kernels[i].shape[1] for i in rest))
+    padded = pad_image(image, mH, mW).astype(dtype)
+    if image.ndim == 3 and padded.ndim == 2:
+        padded = padded[:, :, np.newaxis]
+
+    # the rest (FFT-sized kernels, large non-separable direct ones and
+    # images with more channels than OpenCV filters at once) run through
+    # `correlate_padded` on the shared padded image
+    for i in rest:
+        kernel = kernels[i]
+        (oY, oX) = (mH // 2 - kernel.shape[0] // 2, mW // 2 - kernel.shape[1] // 2)
+        view = padded[oY:oY + iH + kernel.shape[0] - 1,
+            oX:oX + iW + kernel.shape[1] - 1]
+        output[i] = correlate_padded(view, kernel, iH, iW, dtype)
+
+    return output
@@ -0,0 +1,75 @@
+# import the necessary packages
+import numpy as np
+import cv2
+
+def bucket_boxes(labels):
+    # the (y0, y1, x0, x1) bounding box (inclusive) of the pixels of
+    # every distinct value of an 8-bit label image, found with a single
+    # stable sort of the pixels by their label
+    (h, w) = labels.shape
+    order = np.argsort(labels.ravel(), kind="stable")
+    values = labels.ravel()[order]
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    (ys, xs) = np.divmod(order, w)
+
+    return zip(values[starts], np.minimum.reduceat(ys, starts),
+        np.maximum.reduceat(ys, starts), np.minimum.reduceat(xs, starts),
+        np.maximum.reduceat(xs, starts))
+
+def median_wide(image, k, tileSize=128):
+    # order statistics commute with any non-decreasing function of the
+    # values, so a 16-bit median is put together from 8-bit ones: the
+    # high byte of the median is the median of the high bytes, and for
+    # the pixels whose median lies in bucket h, its low byte is the
+    # median of the values clipped to the bucket's range [256h, 256h +
+    # 255] (everything below it becomes 0, everything above it 255).
+    # Every 8-bit median runs through `cv2.medianBlur`, which is the
+    # constant-time (in k) histogram filter of Perreault & Hebert for
+    # kernels of 7 and up -- so the cost never depends on k, only on how
+    # many distinct high bytes every tile of the image holds (one pass
+    # over the bounding box of each, e.g. a few for a smooth image but up
+    # to 256 for pure noise)
+    r = k // 2
+    (H, W) = image.shape
+    high = cv2.medianBlur((image >> 8).astype("uint8"), k)
+    padded = cv2.copyMakeBorder(image, r, r, r, r, cv2.BORDER_REPLICATE)
+    output = high.astype("uint16") << 8
+
+    for ty in range(0, H, tileSize):
+        for tx in range(0, W, tileSize):
+            tile = high[ty:ty + tileSize, tx:tx + tileSize]
+
+            for (h, y0, y1, x0, x1) in bucket_boxes(tile):
+                # filter the bucket's box grown by the kernel radius (taken
+                # from the padded image so the true borders are still
+                # replicated), keeping only the pixels whose median lies
+                # in the bucket
+                (y0, y1, x0, x1) = (y0 + ty, y1 + ty, x0 + tx, x1 + tx)
+                roi = padded[y0:y1 + 2 * r + 1, x0:x1 + 2 * r + 1]
+                low = np.minimum(cv2.subtract(roi, int(h) << 8), 255)
+                low = cv2.medianBlur(low.astype("uint8"), k)[r:r + y1 - y0 + 1,
+                    r:r + x1 - x0 + 1]
+
+                mask = high[y0:y1 + 1, x0:x1 + 1] == h
+                output[y0:y1 + 1, x0:x1 + 1][mask] |= low[mask]
+
+    return output
+
+def median_filter(image, k):
+    # a median filter for 8-bit and 16-bit images with any odd square
+    # kernel, replicating the borders like `cv2.medianBlur` (which only
+    # takes kernels larger than 5 on 8-bit images)
+    if k % 2 == 0 or k < 1:
+        raise ValueError("kernel size must be odd and positive")
+    if image.dtype not in (np.uint8, np.uint16):
+        raise ValueError("only 8-bit and 16-bit images are supported")
+
+    if image.ndim == 3:
+        return np.stack([median_filter(np.ascontiguousarray(image[:, :, c]), k)
+            for c in range(image.shape[2])], axis=-1)
+
+    # OpenCV covers 8-bit images at any size and 16-bit ones up to 5x5
+    if image.dtype == np.uint8 or k <= 5:
+        return cv2.medianBlur(image, k)
+
+    return median_wide(image, k)
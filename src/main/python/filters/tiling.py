@@ -0,0 +1,133 @@
+# import the necessary packages
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import mmap
+import os
+
+# the state of a worker process, set up once by `attach`
+worker = {}
+
+def file_offset(arr):
+    # the byte offset of a memory-mapped array's first element within its
+    # file -- a slice keeps the `offset` of the memmap it was taken from,
+    # so its own start is found from its distance to the start of the
+    # mapping (which numpy aligns down to the allocation granularity)
+    if isinstance(arr.base, mmap.mmap):
+        return arr.offset
+
+    buf = getattr(arr, "_mmap", None)
+    if buf is None:
+        return None
+
+    start = arr.offset - arr.offset % mmap.ALLOCATIONGRANULARITY
+    return start + arr.ctypes.data - np.frombuffer(buf, dtype="uint8").ctypes.data
+
+def share(arr):
+    # describe an array so other processes can open the very same memory
+    # without any pickled copy: a memory-mapped file (or a contiguous
+    # slice of one) is reopened by name at the array's own offset,
+    # anything else -- including a copy-on-write mapping, whose changes
+    # the file does not hold -- is copied once into a shared memory block
+    if isinstance(arr, np.memmap) and arr.filename is not None and \
+        arr.flags.c_contiguous and arr.mode != "c":
+        offset = file_offset(arr)
+        if offset is not None:
+            return (("file", arr.filename, offset, arr.shape, arr.dtype.str),
+                None)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return (("shm", shm.name, 0, arr.shape, arr.dtype.str), shm)
+
+def open_shared(spec, mode):
+    (kind, name, offset, shape, dtype) = spec
+    if kind == "file":
+        return (np.memmap(name, dtype=dtype, mode=mode, offset=offset,
+            shape=shape), None)
+
+    shm = shared_memory.SharedMemory(name=name)
+    return (np.ndarray(shape, dtype=dtype, buffer=shm.buf), shm)
+
+def attach(inputSpec, outputSpec, fn, halo):
+    # map the input and output once per worker process
+    (worker["input"], worker["inputShm"]) = open_shared(inputSpec, "r")
+    (worker["output"], worker["outputShm"]) = open_shared(outputSpec, "r+")
+    (worker["fn"], worker["halo"]) = (fn, halo)
+
+def run_tile(image, output, fn, halo, tile):
+    # run the operation on the tile grown by the halo (clipped to the
+    # image, so the operation handles the true image borders itself) and
+    # keep only the tile itself, whose pixels then never see the edges
+    # of the grown region
+    (y0, y1, x0, x1) = tile
+    (H, W) = image.shape[:2]
+    (gy0, gy1) = (max(y0 - halo, 0), min(y1 + halo, H))
+    (gx0, gx1) = (max(x0 - halo, 0), min(x1 + halo, W))
+
+    result = fn(np.ascontiguousarray(image[gy0:gy1, gx0:gx1]))
+    output[y0:y1, x0:x1] = result[y0 - gy0:y1 - gy0, x0 - gx0:x1 - gx0]
+
+def run_shared_tile(tile):
+    run_tile(worker["input"], worker["output"], worker["fn"], worker["halo"],
+        tile)
+
+def tiled_apply(image, fn, halo, tileSize=1024, workers=-1, output=None):
+    # apply a local, same-size operation (a filter whose output pixel only
+    # depends on the input pixels at most `halo` away) to an image tile by
+    # tile across a pool of processes -- the image may be a memory-mapped
+    # array larger than RAM, and the result is written into a memory-
+    # mapped .npy file when `output` is a path. Since every tile sees all
+    # the pixels its output depends on, the result is identical to
+    # `fn(image)`, provided the operation itself does not change with the
+    # image size (e.g. an FFT convolution rounds differently than a direct
+    # one, so pass `method="direct"` to `convolve` for bit-exact tiles)
+    (H, W) = image.shape[:2]
+    tiles = [(y, min(y + tileSize, H), x, min(x + tileSize, W))
+        for y in range(0, H, tileSize) for x in range(0, W, tileSize)]
+
+    # the first tile (run right here) tells us the type and channels of
+    # the output
+    (y0, y1, x0, x1) = tiles[0]
+    first = fn(np.ascontiguousarray(image[:min(y1 + halo, H),
+        :min(x1 + halo, W)]))[:y1, :x1]
+    shape = (H, W) + first.shape[2:]
+
+    if output is not None:
+        result = np.lib.format.open_memmap(output, mode="w+",
+            dtype=first.dtype, shape=shape)
+    else:
+        result = np.empty(shape, dtype=first.dtype)
+    result[y0:y1, x0:x1] = first
+
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(tiles) == 1:
+        for tile in tiles[1:]:
+            run_tile(image, result, fn, halo, tile)
+    else:
+        # the workers read the input and write the output in place, so
+        # only the tile coordinates cross the process boundary
+        (inputSpec, inputShm) = share(image)
+        (outputSpec, outputShm) = share(result)
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=attach,
+                initargs=(inputSpec, outputSpec, fn, halo)) as pool:
+                list(pool.map(run_shared_tile, tiles[1:]))
+
+            # copy the result back out of shared memory
+            if outputShm is not None:
+                result[...] = np.ndarray(shape, dtype=result.dtype,
+                    buffer=outputShm.buf)
+        finally:
+            for shm in (inputShm, outputShm):
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+
+    if isinstance(result, np.memmap):
+        result.flush()
+
+    return result
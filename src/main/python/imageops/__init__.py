@@ -0,0 +1,11 @@
+from .arithmetic import PixelMap
+from .arithmetic import add
+from .arithmetic import subtract
+from .arithmetic import brightness
+from .arithmetic import contrast
+from .arithmetic import gamma
+from .geometry import Transform
+from .drawing import circles
+from .drawing import rectangles
+from .drawing import lines
+from .mask import Mask
\ No newline at end of file
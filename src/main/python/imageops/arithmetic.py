@@ -0,0 +1,68 @@
+# import the necessary packages
+import numpy as np
+import cv2
+
+class PixelMap:
+    def __init__(self, table=None):
+        # a per-pixel map of 8-bit intensities is fully described by a
+        # 256-entry lookup table, starting from the identity
+        self.table = np.arange(256, dtype="uint8") if table is None else table
+
+    def map(self, fn):
+        # evaluate the function on the *current* output of every input
+        # level, rounding and saturating to [0, 255] like OpenCV does --
+        # so chaining maps composes their tables and a whole chain of
+        # operations is applied with a single lookup pass
+        values = fn(self.table.astype("float64"))
+        return PixelMap(np.clip(np.rint(values), 0, 255).astype("uint8"))
+
+    def then(self, other):
+        # compose with another map (this one is applied first)
+        return PixelMap(other.table[self.table])
+
+    def add(self, value):
+        return self.map(lambda x: x + value)
+
+    def subtract(self, value):
+        return self.map(lambda x: x - value)
+
+    def contrast(self, alpha, beta=0.0):
+        # scale the intensities by alpha and shift them by beta
+        return self.map(lambda x: alpha * x + beta)
+
+    def gamma(self, gamma):
+        # gamma correction, where gamma < 1 darkens and gamma > 1 brightens
+        return self.map(lambda x: ((x / 255.0) ** (1.0 / gamma)) * 255.0)
+
+    def apply(self, image, out=None):
+        # a single pass over the image, writing into `out` when given
+        # (which may be the image itself)
+        if image.dtype != np.uint8:
+            raise ValueError("lookup tables require an 8-bit image")
+
+        # OpenCV would silently allocate a new array rather than write
+        # into an output it cannot use, so check it up front
+        if out is not None and (out.shape != image.shape or
+            out.dtype != np.uint8 or not out.flags.c_contiguous):
+            raise ValueError("out must be a contiguous uint8 array of shape {}".format(
+                image.shape))
+
+        return cv2.LUT(image, self.table, dst=out)
+
+def add(image, value, out=None):
+    # saturating addition of a scalar, without building a full-size
+    # array of the scalar first
+    return PixelMap().add(value).apply(image, out=out)
+
+def subtract(image, value, out=None):
+    return PixelMap().subtract(value).apply(image, out=out)
+
+def brightness(image, value, out=None):
+    # brighten (or, with a negative value, darken) the image
+    return add(image, value, out=out)
+
+def contrast(image, alpha, beta=0.0, out=None):
+    return PixelMap().contrast(alpha, beta).apply(image, out=out)
+
+def gamma(image, gamma, out=None):
+    return PixelMap().gamma(gamma).apply(image, out=out)
@@ -0,0 +1,261 @@
+# import the necessary packages
+import numpy as np
+
+def shape_colors(canvas, colors, n):
+    # one color per shape (or a single color shared by all of them),
+    # rounded and saturated to the canvas type just like OpenCV does
+    channels = canvas.shape[2] if canvas.ndim == 3 else 1
+    colors = np.asarray(colors, dtype="float64").reshape((-1, channels))
+    if canvas.dtype.kind in "ui":
+        info = np.iinfo(canvas.dtype)
+        colors = np.clip(np.rint(colors), info.min, info.max)
+
+    colors = np.broadcast_to(colors.astype(canvas.dtype), (n, channels))
+    return colors if canvas.ndim == 3 else colors[:, 0]
+
+def clip_spans(canvas, rows, x0, x1):
+    # clip the horizontal (row, x0..x1 inclusive) spans to the canvas,
+    # returning the ones left along with their indices
+    (h, w) = canvas.shape[:2]
+    x0 = np.maximum(x0, 0)
+    x1 = np.minimum(x1, w - 1)
+    keep = np.flatnonzero((rows >= 0) & (rows < h) & (x0 <= x1))
+
+    return (rows[keep], x0[keep], x1[keep], keep)
+
+def fill(canvas, owner, colors):
+    # write the color of its owning shape into every painted pixel
+    # exactly once
+    (h, w) = canvas.shape[:2]
+    pixels = np.flatnonzero(owner.reshape(-1) >= 0)
+    shapes = owner.reshape(-1)[pixels]
+
+    if not canvas.flags.c_contiguous:
+        canvas[pixels // w, pixels % w] = colors[shapes]
+        return canvas
+
+    # view every pixel (all of its channels) as a single opaque element
+    # so the fancy indexing moves whole pixels at once
+    item = np.dtype((np.void, canvas.itemsize * (canvas.size // (h * w))))
+    colors = np.ascontiguousarray(colors).view(item).reshape(-1)
+    canvas.view(item).reshape(-1)[pixels] = colors[shapes]
+
+    return canvas
+
+def paint_pixels(canvas, ys, xs, shapes, colors):
+    # shapes are drawn in order, so every pixel takes the color of the
+    # last shape covering it: find that shape with a single unbuffered
+    # maximum over the pixel's flat index
+    (h, w) = canvas.shape[:2]
+    owner = np.full(h * w, -1, dtype="int64")
+    np.maximum.at(owner, ys * w + xs, shapes)
+
+    return fill(canvas, owner, colors)
+
+def paint_spans(canvas, rows, x0, x1, shapes, colors):
+    # the same as `paint_pixels`, without ever expanding the spans into
+    # pixels: every span is split into two (overlapping) runs of 2^k
+    # pixels, the largest power of two that fits, and the shape index is
+    # max-ed into level k of a sparse table at both run starts; walking
+    # down the levels, every run then hands its value on to the two runs
+    # of half its length it covers, until level 0 holds the owner of every
+    # single pixel -- so the cost is one update per span plus a few passes
+    # over the canvas, whatever the area of the shapes
+    (h, w) = canvas.shape[:2]
+    (rows, x0, x1, keep) = clip_spans(canvas, rows, x0, x1)
+    shapes = shapes[keep]
+    if len(shapes) == 0:
+        return canvas
+
+    levels = np.floor(np.log2((x1 - x0 + 1).astype("float32"))).astype("int8")
+    shapes = shapes.astype("int32")
+    owner = None
+
+    for k in range(levels.max(), -1, -1):
+        # hand the runs of the level above down to this one
+        run = np.full((h, w), -1, dtype="int32")
+        if owner is not None:
+            half = 1 << k
+            np.maximum(run, owner, out=run)
+            np.maximum(run[:, half:], owner[:, :-half], out=run[:, half:])
+
+        # then add the runs starting on this level
+        idx = np.flatnonzero(levels == k)
+        (r, s) = (rows[idx] * w, shapes[idx])
+        np.maximum.at(run.reshape(-1), r + x0[idx], s)
+        np.maximum.at(run.reshape(-1), r + x1[idx] - (1 << k) + 1, s)
+        owner = run
+
+    return fill(canvas, owner, colors)
+
+def circle_widths(radii):
+    # the half-width of every row (0..r from the center) of a filled
+    # circle, replaying the integer midpoint algorithm `cv2.circle` uses
+    # for all the (distinct) radii at once
+    widths = np.zeros((len(radii), radii.max() + 1), dtype="int64")
+    index = np.arange(len(radii))
+    (dx, dy) = (radii.copy(), np.zeros_like(radii))
+    (err, plus, minus) = (np.zeros_like(radii), np.ones_like(radii),
+        2 * radii - 1)
+
+    while True:
+        active = dx >= dy
+        if not active.any():
+            break
+
+        # the rows dy away from the center span dx pixels on each side,
+        # and the rows dx away span dy pixels
+        (i, x, y) = (index[active], dx[active], dy[active])
+        widths[i, y] = np.maximum(widths[i, y], x)
+        widths[i, x] = np.maximum(widths[i, x], y)
+
+        dy += 1
+        err += plus
+        plus += 2
+        mask = np.where(err <= 0, 0, -1)
+        err -= minus & mask
+        dx += mask
+        minus -= mask & 2
+
+    return widths
+
+def circles(canvas, centers, radii, colors):
+    # draw filled circles in place, giving the same pixels as calling
+    # `cv2.circle(canvas, center, radius, color, -1)` for each in turn
+    centers = np.asarray(centers, dtype="int64").reshape((-1, 2))
+    radii = np.broadcast_to(np.asarray(radii, dtype="int64"), len(centers))
+    colors = shape_colors(canvas, colors, len(centers))
+    if len(centers) == 0:
+        return canvas
+
+    # one span per row of every circle, rows -r..r around its center,
+    # built for all the circles sharing a radius at once
+    (unique, which) = np.unique(radii, return_inverse=True)
+    widths = circle_widths(unique)
+    which = which.reshape(-1)
+    order = np.argsort(which, kind="stable")
+    bounds = np.searchsorted(which[order], np.arange(len(unique) + 1))
+    spans = []
+
+    for (i, r) in enumerate(unique):
+        idx = order[bounds[i]:bounds[i + 1]]
+        offsets = np.arange(-r, r + 1)
+        half = widths[i, np.abs(offsets)]
+        (cx, cy) = (centers[idx, :1], centers[idx, 1:])
+        spans.append((cy + offsets, cx - half, cx + half,
+            np.broadcast_to(idx[:, np.newaxis], (len(idx), len(offsets)))))
+
+    (rows, x0, x1, circle) = [np.concatenate([span[c].ravel()
+        for span in spans]) for c in range(4)]
+    return paint_spans(canvas, rows, x0, x1, circle, colors)
+
+def rectangles(canvas, pt1, pt2, colors):
+    # draw filled rectangles in place, giving the same pixels as calling
+    # `cv2.rectangle(canvas, pt1, pt2, color, -1)` for each in turn
+    pt1 = np.asarray(pt1, dtype="int64").reshape((-1, 2))
+    pt2 = np.asarray(pt2, dtype="int64").reshape((-1, 2))
+    colors = shape_colors(canvas, colors, len(pt1))
+    if len(pt1) == 0:
+        return canvas
+
+    # only the rows inside the canvas become spans
+    (x0, x1) = (np.minimum(pt1[:, 0], pt2[:, 0]), np.maximum(pt1[:, 0], pt2[:, 0]))
+    y0 = np.maximum(np.minimum(pt1[:, 1], pt2[:, 1]), 0)
+    y1 = np.minimum(np.maximum(pt1[:, 1], pt2[:, 1]), canvas.shape[0] - 1)
+    counts = np.maximum(y1 - y0 + 1, 0)
+
+    rect = np.repeat(np.arange(len(pt1)), counts)
+    rows = y0[rect] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts)
+        - counts, counts)
+
+    return paint_spans(canvas, rows, x0[rect], x1[rect], rect, colors)
+
+def outcodes(x, y, right, bottom):
+    # Cohen-Sutherland region codes
+    return (x < 0) + (x > right) * 2 + (y < 0) * 4 + (y > bottom) * 8
+
+def clip_lines(pt1, pt2, width, height):
+    # move the end points of the lines onto the canvas border exactly like
+    # OpenCV's `clipLine` (truncating the intersections toward zero), since
+    # Bresenham's stepping depends on where the line starts and ends
+    (x1, y1, x2, y2) = (pt1[:, 0].copy(), pt1[:, 1].copy(), pt2[:, 0].copy(),
+        pt2[:, 1].copy())
+    (right, bottom) = (width - 1, height - 1)
+    c1 = outcodes(x1, y1, right, bottom)
+    c2 = outcodes(x2, y2, right, bottom)
+
+    def step(num, den):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.trunc(num.astype("float64") / np.where(den == 0, 1,
+                den)).astype("int64")
+
+    clip = ((c1 & c2) == 0) & ((c1 | c2) != 0)
+
+    # first clip against the top and bottom edges...
+    todo = clip & ((c1 & 12) != 0)
+    a = np.where(c1 < 8, 0, bottom)
+    x1 = np.where(todo, x1 + step((a - y1) * (x2 - x1), y2 - y1), x1)
+    y1 = np.where(todo, a, y1)
+    c1 = np.where(todo, outcodes(x1, 0, right, 0), c1)
+
+    todo = clip & ((c2 & 12) != 0)
+    a = np.where(c2 < 8, 0, bottom)
+    x2 = np.where(todo, x2 + step((a - y2) * (x2 - x1), y2 - y1), x2)
+    y2 = np.where(todo, a, y2)
+    c2 = np.where(todo, outcodes(x2, 0, right, 0), c2)
+
+    # ...then against the left and right ones
+    clip &= ((c1 & c2) == 0) & ((c1 | c2) != 0)
+
+    todo = clip & (c1 != 0)
+    a = np.where(c1 == 1, 0, right)
+    y1 = np.where(todo, y1 + step((a - x1) * (y2 - y1), x2 - x1), y1)
+    x1 = np.where(todo, a, x1)
+    c1 = np.where(todo, 0, c1)
+
+    todo = clip & (c2 != 0)
+    a = np.where(c2 == 1, 0, right)
+    y2 = np.where(todo, y2 + step((a - x2) * (y2 - y1), x2 - x1), y2)
+    x2 = np.where(todo, a, x2)
+    c2 = np.where(todo, 0, c2)
+
+    visible = (c1 | c2) == 0
+    return (np.stack([x1, y1], axis=1), np.stack([x2, y2], axis=1), visible)
+
+def lines(canvas, pt1, pt2, colors):
+    # draw one pixel wide 8-connected lines in place, giving the same
+    # pixels as calling `cv2.line(canvas, pt1, pt2, color)` for each in turn
+    pt1 = np.asarray(pt1, dtype="int64").reshape((-1, 2))
+    pt2 = np.asarray(pt2, dtype="int64").reshape((-1, 2))
+    colors = shape_colors(canvas, colors, len(pt1))
+    if len(pt1) == 0:
+        return canvas
+
+    # clip the lines to the canvas, dropping the ones that miss it
+    (h, w) = canvas.shape[:2]
+    (pt1, pt2, visible) = clip_lines(pt1, pt2, w, h)
+    index = np.flatnonzero(visible)
+    (pt1, pt2) = (pt1[index], pt2[index])
+
+    # always step from left to right
+    swap = pt2[:, 0] < pt1[:, 0]
+    (start, end) = (np.where(swap[:, np.newaxis], pt2, pt1),
+        np.where(swap[:, np.newaxis], pt1, pt2))
+    dx = end[:, 0] - start[:, 0]
+    dy = np.abs(end[:, 1] - start[:, 1])
+    sy = np.where(end[:, 1] < start[:, 1], -1, 1)
+
+    # every line has one pixel per step along its major axis, and after
+    # i steps Bresenham's error term has moved it ceil((2 * minor * i -
+    # major) / (2 * major)) pixels along the minor one
+    steep = dy > dx
+    (major, minor) = (np.where(steep, dy, dx), np.where(steep, dx, dy))
+    counts = major + 1
+    line = np.repeat(np.arange(len(pt1)), counts)
+    i = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    m = -((major[line] - 2 * minor[line] * i) // np.maximum(2 * major[line], 1))
+
+    xs = start[line, 0] + np.where(steep[line], m, i)
+    ys = start[line, 1] + sy[line] * np.where(steep[line], i, m)
+
+    return paint_pixels(canvas, ys, xs, index[line], colors)
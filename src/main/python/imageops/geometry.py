@@ -0,0 +1,88 @@
+# import the necessary packages
+import numpy as np
+import cv2
+
+class Transform:
+    def __init__(self, width, height):
+        # start from the identity on an input image of the given size;
+        # every step below updates the 3x3 affine matrix (mapping input
+        # coordinates to output coordinates) and the output size, so
+        # the whole chain resamples the image only once
+        self.matrix = np.eye(3)
+        self.size = (width, height)
+        self.maps = None
+
+    def then(self, M, size=None):
+        # compose a further (2x3 or 3x3) step onto the chain
+        M = np.vstack([np.asarray(M, dtype="float64")[:2], [0, 0, 1]])
+        self.matrix = M @ self.matrix
+        self.size = self.size if size is None else size
+        self.maps = None
+        return self
+
+    def translate(self, x, y):
+        return self.then([[1, 0, x], [0, 1, y]])
+
+    def rotate(self, angle, center=None, scale=1.0):
+        # rotate about the center of the current output unless told
+        # otherwise, just like `cv2.getRotationMatrix2D`
+        if center is None:
+            center = (self.size[0] // 2, self.size[1] // 2)
+
+        return self.then(cv2.getRotationMatrix2D(center, angle, scale))
+
+    def resize(self, width, height):
+        # scale to the new output size using the same pixel-center
+        # convention as `cv2.resize`
+        (sx, sy) = (width / float(self.size[0]), height / float(self.size[1]))
+        return self.then([[sx, 0, 0.5 * (sx - 1)], [0, sy, 0.5 * (sy - 1)]],
+            size=(width, height))
+
+    def flip(self, flipCode):
+        # mirror the current output like `cv2.flip`: 1 flips horizontally,
+        # 0 vertically and -1 along both axes
+        (w, h) = self.size
+        (fx, fy) = (flipCode != 0, flipCode <= 0)
+        return self.then([[-1 if fx else 1, 0, w - 1 if fx else 0],
+            [0, -1 if fy else 1, h - 1 if fy else 0]])
+
+    def crop(self, x0, y0, x1, y1):
+        # keep the [y0:y1, x0:x1] region of the current output
+        return self.then([[1, 0, -x0], [0, 1, -y0]], size=(x1 - x0, y1 - y0))
+
+    def apply(self, image, interpolation=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_CONSTANT, cache=True):
+        # resample the image once with the composed matrix
+        if not cache:
+            return cv2.warpAffine(image, self.matrix[:2], self.size,
+                flags=interpolation, borderMode=borderMode)
+
+        # when the same transform is applied to many frames of the same
+        # size, compute the per-pixel source coordinates once and only run
+        # `cv2.remap` per frame
+        key = (image.shape[:2], interpolation)
+        if self.maps is None or self.maps[0] != key:
+            self.maps = (key,) + self.build_maps(interpolation)
+
+        return cv2.remap(image, self.maps[1], self.maps[2], interpolation,
+            borderMode=borderMode)
+
+    def build_maps(self, interpolation):
+        # map every output pixel back to its source coordinates, kept as a
+        # single two-channel float32 map. OpenCV's compact fixed-point maps
+        # (CV_16SC2) are not used: they snap every coordinate to 1/32 of a
+        # pixel, while `cv2.warpAffine` accumulates its coordinates in
+        # finer fixed point, so a rotated frame would differ in most of its
+        # pixels by several levels -- remapping with the float map agrees
+        # with `cv2.warpAffine` to within one level (though a nearest-
+        # neighbor lookup may still round a coordinate lying right between
+        # two pixels the other way)
+        (w, h) = self.size
+        M = cv2.invertAffineTransform(self.matrix[:2])
+        xs = np.arange(w, dtype="float64")
+        ys = np.arange(h, dtype="float64")[:, np.newaxis]
+        mapXY = np.empty((h, w, 2), dtype="float32")
+        mapXY[:, :, 0] = M[0, 0] * xs + M[0, 1] * ys + M[0, 2]
+        mapXY[:, :, 1] = M[1, 0] * xs + M[1, 1] * ys + M[1, 2]
+
+        return (mapXY, None)
@@ -0,0 +1,206 @@
+# import the necessary packages
+import numpy as np
+import cv2
+
+def intersect(a, b):
+    # the intersection of two (x, y, w, h) boxes, empty when disjoint
+    (x0, y0) = (max(a[0], b[0]), max(a[1], b[1]))
+    (x1, y1) = (min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3]))
+    return (x0, y0, max(x1 - x0, 0), max(y1 - y0, 0))
+
+def union(a, b):
+    # the smallest box covering two (x, y, w, h) boxes
+    if a[2] * a[3] == 0:
+        return b
+    if b[2] * b[3] == 0:
+        return a
+
+    (x0, y0) = (min(a[0], b[0]), min(a[1], b[1]))
+    (x1, y1) = (max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3]))
+    return (x0, y0, x1 - x0, y1 - y0)
+
+class Mask:
+    def __init__(self, shape, bbox=(0, 0, 0, 0), crop=None):
+        # a binary mask over a frame of the given (height, width), stored
+        # as its (x, y, w, h) bounding box along with the 8-bit (0/255)
+        # mask of just that box -- so every operation below costs in
+        # proportion to the box rather than to the frame
+        self.shape = tuple(shape[:2])
+        self.bbox = tuple(int(v) for v in bbox)
+        self.crop = crop if crop is not None else np.zeros((self.bbox[3],
+            self.bbox[2]), dtype="uint8")
+
+    @classmethod
+    def from_dense(cls, mask):
+        # wrap a full-frame mask (any nonzero pixel is set)
+        mask = (mask != 0).view("uint8") * np.uint8(255)
+        (x, y, w, h) = cv2.boundingRect(mask)
+        return cls(mask.shape, (x, y, w, h), mask[y:y + h, x:x + w].copy())
+
+    @classmethod
+    def from_runs(cls, shape, runs):
+        # build the mask from (row, start, end) runs, each covering the
+        # pixels [start, end) of its row
+        runs = np.asarray(runs, dtype="int64").reshape((-1, 3))
+        if len(runs) == 0:
+            return cls(shape)
+
+        (x0, y0) = (runs[:, 1].min(), runs[:, 0].min())
+        (x1, y1) = (runs[:, 2].max(), runs[:, 0].max() + 1)
+
+        # mark where every run starts and ends, and let a running sum
+        # along each row fill the pixels in between
+        edges = np.zeros((y1 - y0, x1 - x0 + 1), dtype="int32")
+        np.add.at(edges, (runs[:, 0] - y0, runs[:, 1] - x0), 1)
+        np.add.at(edges, (runs[:, 0] - y0, runs[:, 2] - x0), -1)
+        crop = (np.cumsum(edges[:, :-1], axis=1) > 0).view("uint8") * np.uint8(255)
+
+        return cls(shape, (x0, y0, x1 - x0, y1 - y0), crop)._tighten()
+
+    @classmethod
+    def rectangle(cls, shape, pt1, pt2):
+        # the mask drawn by `cv2.rectangle(mask, pt1, pt2, 255, -1)`
+        (x0, x1) = sorted((pt1[0], pt2[0]))
+        (y0, y1) = sorted((pt1[1], pt2[1]))
+        box = intersect((0, 0, shape[1], shape[0]),
+            (x0, y0, x1 - x0 + 1, y1 - y0 + 1))
+
+        return cls(shape, box, np.full((box[3], box[2]), 255, dtype="uint8"))
+
+    @classmethod
+    def circle(cls, shape, center, radius):
+        # the mask drawn by `cv2.circle(mask, center, radius, 255, -1)`,
+        # drawing only the (clipped) box around the circle
+        box = intersect((0, 0, shape[1], shape[0]), (center[0] - radius,
+            center[1] - radius, 2 * radius + 1, 2 * radius + 1))
+        if box[2] * box[3] == 0:
+            return cls(shape)
+
+        crop = np.zeros((box[3], box[2]), dtype="uint8")
+        cv2.circle(crop, (center[0] - box[0], center[1] - box[1]), radius,
+            255, -1)
+
+        return cls(shape, box, crop)._tighten()
+
+    def _tighten(self):
+        # shrink the box to the pixels actually set
+        if self.crop.size == 0:
+            return Mask(self.shape)
+
+        (x, y, w, h) = cv2.boundingRect(self.crop)
+        self.crop = self.crop[y:y + h, x:x + w]
+        self.bbox = (self.bbox[0] + x, self.bbox[1] + y, w, h)
+        return self
+
+    def _region(self, box):
+        # the mask over an arbitrary box, zero wherever it is not covered
+        # by this mask's own box
+        out = np.zeros((box[3], box[2]), dtype="uint8")
+        (x, y, w, h) = intersect(self.bbox, box)
+        if w * h > 0:
+            out[y - box[1]:y - box[1] + h, x - box[0]:x - box[0] + w] = \
+                self.crop[y - self.bbox[1]:y - self.bbox[1] + h,
+                x - self.bbox[0]:x - self.bbox[0] + w]
+
+        return out
+
+    def _combine(self, other, op, box):
+        if box[2] * box[3] == 0:
+            return Mask(self.shape)
+
+        crop = op(self._region(box), other._region(box))
+        return Mask(self.shape, box, crop)._tighten()
+
+    def __and__(self, other):
+        return self._combine(other, cv2.bitwise_and,
+            intersect(self.bbox, other.bbox))
+
+    def __or__(self, other):
+        return self._combine(other, cv2.bitwise_or,
+            union(self.bbox, other.bbox))
+
+    def __xor__(self, other):
+        return self._combine(other, cv2.bitwise_xor,
+            union(self.bbox, other.bbox))
+
+    def __invert__(self):
+        # the complement covers (nearly) the whole frame, so it is the one
+        # operation that costs in proportion to the frame
+        (h, w) = self.shape
+        crop = cv2.bitwise_not(self._region((0, 0, w, h)))
+        return Mask(self.shape, (0, 0, w, h), crop)._tighten()
+
+    def area(self):
+        # the number of pixels set
+        return cv2.countNonZero(self.crop) if self.crop.size > 0 else 0
+
+    def roi(self, image):
+        # the (view of the) image inside the bounding box
+        (x, y, w, h) = self.bbox
+        return image[y:y + h, x:x + w]
+
+    def crop_image(self, image):
+        # the masked image cropped to the bounding box
+        roi = self.roi(image)
+        if self.crop.size == 0:
+            return roi.copy()
+
+        return cv2.bitwise_and(roi, roi, mask=self.crop)
+
+    def apply(self, image, out=None):
+        # the same as `cv2.bitwise_and(image, image, mask=mask)`: when no
+        # output is given, a zeroed frame is allocated (whose pages the OS
+        # only hands out once written) and only the box is ever touched;
+        # into an existing output only the masked pixels are copied
+        if out is None:
+            out = np.zeros_like(image)
+
+        if self.crop.size > 0:
+            cv2.copyTo(self.roi(image), self.crop, self.roi(out))
+
+        return out
+
+    def mean(self, image):
+        # the per-channel mean of the masked pixels, like `cv2.mean`
+        if self.crop.size == 0:
+            return (0.0, 0.0, 0.0, 0.0)
+
+        return cv2.mean(self.roi(image), mask=self.crop)
+
+    def mean_std(self, image):
+        # the per-channel mean and standard deviation of the masked pixels,
+        # like `cv2.meanStdDev` (with one row per channel of the image)
+        if self.crop.size == 0:
+            channels = image.shape[2] if image.ndim == 3 else 1
+            return (np.zeros((channels, 1)), np.zeros((channels, 1)))
+
+        return cv2.meanStdDev(self.roi(image), mask=self.crop)
+
+    def min_max(self, image):
+        # the smallest and largest value of the masked pixels of a single
+        # channel image, along with their (x, y) frame coordinates -- like
+        # `cv2.minMaxLoc` with an empty mask, all zeros and (-1, -1)
+        if self.crop.size == 0:
+            return (0.0, 0.0, (-1, -1), (-1, -1))
+
+        (lo, hi, loc, hic) = cv2.minMaxLoc(self.roi(image), mask=self.crop)
+        (x, y) = self.bbox[:2]
+        return (lo, hi, (loc[0] + x, loc[1] + y), (hic[0] + x, hic[1] + y))
+
+    def runs(self):
+        # the mask as (row, start, end) runs in frame coordinates, each
+        # covering the pixels [start, end) of its row
+        (x, y, w, h) = self.bbox
+        padded = np.zeros((h, w + 2), dtype="int8")
+        padded[:, 1:-1] = self.crop != 0
+        (rows, cols) = np.nonzero(np.diff(padded, axis=1))
+        (starts, ends) = (cols[0::2], cols[1::2])
+
+        return np.stack([rows[0::2] + y, starts + x, ends + x], axis=1)
+
+    def to_dense(self):
+        # the full-frame 8-bit mask
+        dense = np.zeros(self.shape, dtype="uint8")
+        (x, y, w, h) = self.bbox
+        dense[y:y + h, x:x + w] = self.crop
+        return dense
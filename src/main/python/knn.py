@@ -3,11 +3,17 @@
 
 # import the necessary packages
 from sklearn.neighbors import KNeighborsClassifier
-from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 from preprocessing import SimplePreprocessor
 from datasets import SimpleDatasetLoader
+from datasets import DatasetCache
+from datasets import DatasetManifest
+from datasets import LoaderMetrics
+from datasets import JSONReporter
+from neighbors import KNNClassifier
+from neighbors import IVFClassifier
+from neighbors import recall
 from imutils import paths
 import argparse
 
@@ -16,25 +22,43 @@ ap = argparse.ArgumentParser()
 ap.add_argument("-d", "--dataset", required=True, help="path to input dataset")
 ap.add_argument("-k", "--neighbors", type=int, default=1, help="# of nearest neighbors for classification")
 ap.add_argument("-j", "--jobs", type=int, default=-1, help="# of jobs for k-NN distance (-1 uses all available cores)")
+ap.add_argument("-e", "--engine", default="brute", choices=["brute", "ivf", "sklearn"], help="k-NN engine to use for classification")
+ap.add_argument("-m", "--memory", type=int, default=256, help="memory budget (in MB) for the brute-force distance matrices")
+ap.add_argument("-l", "--lists", type=int, default=None, help="# of clusters in the approximate (ivf) index (defaults to sqrt(N))")
+ap.add_argument("-p", "--probes", type=int, default=8, help="# of clusters the approximate (ivf) index scans per query")
+ap.add_argument("-c", "--cache", default=None, help="path to the preprocessed dataset cache directory")
+ap.add_argument("-t", "--timings", default=None, help="path to write the per-stage loading timings (JSON) to")
+ap.add_argument("-i", "--manifest", default=None, help="path to an (incrementally refreshed) dataset manifest file")
+ap.add_argument("-T", "--trust-manifest", action="store_true", help="key the cache on the manifest alone (images rewritten in place are not noticed)")
 args = vars(ap.parse_args())
 
 # grab the list of images that we'll be describing
 print("[INFO] loading images...")
-imagePaths = list(paths.list_images(args["dataset"]))
+if args["manifest"] is not None:
+	# only directories whose modification time changed are listed again
+	imagePaths = DatasetManifest.open(args["dataset"], args["manifest"])
+else:
+	imagePaths = list(paths.list_images(args["dataset"]))
 
 # initialize the image preprocessor, load the dataset from disk, and reshape the data matrix
 sp = SimplePreprocessor(32, 32)
-sdl = SimpleDatasetLoader(preprocessors=[sp])
-(data, labels) = sdl.load(imagePath, verbose=500)
+cache = None
+if args["cache"] is not None:
+	cache = DatasetCache(args["cache"], trustManifest=args["trust_manifest"])
+metrics = None
+if args["timings"] is not None:
+	metrics = LoaderMetrics(reporters=[JSONReporter(args["timings"])])
+sdl = SimpleDatasetLoader(preprocessors=[sp], workers=args["jobs"], cache=cache,
+	reducedDecode=True, metrics=metrics)
+(data, labels, classes) = sdl.load(imagePaths, verbose=500, encodeLabels=True)
+
+# the loader returns one contiguous array, so flattening each image into
+# a feature vector is a view rather than a copy
 data = data.reshape((data.shape[0], 3072))
 
 # Show dome information on memory consumption of the images
 print("[INFO] features matrix: {:.1f}MB".format(data.nbytes / (1024 * 1000.0)))
 
-# encode the labels as integers
-le = LabelEncoder()
-labels = le.fit_transform(labels)
-
 # partition the data into training and testing splits using 75% of
 # the data for training and the remaining 25% for testing
 (trainX, testX, trainY, testY) = train_test_split(data, labels,
@@ -42,6 +66,21 @@ labels = le.fit_transform(labels)
 
 # train and evaluate a k-NN classifier on the raw pixel intensities
 print("[INFO] evaluating k-NN classifier...")
-model = KNeighborsClassifier(n_neighbors=args["neighbors"], n_jobs=args["jobs"])
+if args["engine"] == "brute":
+	model = KNNClassifier(neighbors=args["neighbors"], jobs=args["jobs"],
+		memoryBudget=args["memory"] * 1024 * 1024)
+elif args["engine"] == "ivf":
+	model = IVFClassifier(neighbors=args["neighbors"], lists=args["lists"],
+		probes=args["probes"], jobs=args["jobs"],
+		memoryBudget=args["memory"] * 1024 * 1024)
+else:
+	model = KNeighborsClassifier(n_neighbors=args["neighbors"], n_jobs=args["jobs"])
 model.fit(trainX, trainY)
-print(classification_report(testY, model.predict(testX), target_names=le.classes_))
\ No newline at end of file
+print(classification_report(testY, model.predict(testX), target_names=classes))
+
+# report how many of the exact neighbors the approximate index found
+if args["engine"] == "ivf":
+	exact = KNNClassifier(neighbors=args["neighbors"], jobs=args["jobs"],
+		memoryBudget=args["memory"] * 1024 * 1024).fit(trainX, trainY)
+	print("[INFO] recall@{}: {:.4f}".format(args["neighbors"],
+		recall(model.kneighbors(testX)[1], exact.kneighbors(testX)[1])))
\ No newline at end of file
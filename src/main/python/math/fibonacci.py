@@ -1,8 +1,66 @@
 # Fibonacci
+from functools import lru_cache
+
+def fib_pair(n):
+    # fast doubling: walk the bits of n from the most significant one,
+    # keeping (a, b) = (F(k), F(k + 1)) and using
+    #   F(2k)     = F(k) * (2 * F(k + 1) - F(k))
+    #   F(2k + 1) = F(k + 1)^2 + F(k)^2
+    # so only O(log n) big-integer multiplications are needed (and no
+    # recursion, so there is no recursion limit to hit)
+    if n < 0:
+        raise ValueError("n must be non-negative")
+
+    (a, b) = (0, 1)
+    for bit in bin(n)[2:]:
+        (a, b) = (a * (2 * b - a), a * a + b * b)
+        if bit == "1":
+            (a, b) = (b, a + b)
+
+    return (a, b)
+
+@lru_cache(maxsize=1024)
 def fib(n):
-    if n==0:
-        return 0
-    elif n ==1:
-        return 1
-    else:
-        return fib(n-1) + fib(n-2)
\ No newline at end of file
+    # repeated calls are served from a bounded cache
+    return fib_pair(n)[0]
+
+def fib_range(n):
+    # F(0), F(1), ..., F(n) in a single pass of additions
+    if n < 0:
+        raise ValueError("n must be non-negative")
+
+    values = [0] * (n + 1)
+    if n > 0:
+        values[1] = 1
+    for i in range(2, n + 1):
+        values[i] = values[i - 1] + values[i - 2]
+
+    return values
+
+def fib_many(indices):
+    # compute many indices at once: when they are dense, a single run of
+    # additions up to the largest index is cheapest, otherwise use fast
+    # doubling for every distinct index
+    indices = list(indices)
+    if len(indices) == 0:
+        return []
+    if min(indices) < 0:
+        raise ValueError("n must be non-negative")
+
+    # the additions only ever hold the last two numbers, keeping just the
+    # requested ones, so the memory stays in proportion to the output
+    # rather than to all of F(0..top)
+    top = max(indices)
+    wanted = set(indices)
+    if top < 64 * len(wanted):
+        values = {}
+        (a, b) = (0, 1)
+        for i in range(top + 1):
+            if i in wanted:
+                values[i] = a
+            (a, b) = (b, a + b)
+
+        return [values[i] for i in indices]
+
+    values = {i: fib(i) for i in wanted}
+    return [values[i] for i in indices]
@@ -0,0 +1,3 @@
+from .knnclassifier import KNNClassifier
+from .ivfclassifier import IVFClassifier
+from .ivfclassifier import recall
\ No newline at end of file
@@ -0,0 +1,110 @@
+import numpy as np
+from .knnclassifier import KNNClassifier
+
+class IVFClassifier(KNNClassifier):
+    def __init__(self, neighbors=1, lists=None, probes=8, iterations=10,
+        jobs=-1, memoryBudget=256 * 1024 * 1024, seed=42):
+        # an inverted file (IVF) index partitions the training vectors
+        # into `lists` clusters (sqrt(N) by default) at build time and only
+        # scans the `probes` clusters nearest to each query -- more
+        # probes trade speed for recall
+        super().__init__(neighbors=neighbors, jobs=jobs,
+            memoryBudget=memoryBudget)
+        self.lists = lists
+        self.probes = probes
+        self.iterations = iterations
+        self.seed = seed
+
+    def _nearest_centroids(self, X, n):
+        # the coarse quantizer is itself an exact k-NN search over the
+        # (few) centroids
+        quantizer = KNNClassifier(neighbors=n, jobs=self.jobs,
+            memoryBudget=self.memoryBudget, refine=0)
+        quantizer.fit(self.centroids, np.arange(len(self.centroids)))
+
+        return quantizer.kneighbors(X)[1]
+
+    def fit(self, X, y):
+        X = np.asarray(X).reshape((len(X), -1))
+        (self.classes_, self.y) = np.unique(y, return_inverse=True)
+        lists = self.lists or max(1, int(np.sqrt(len(X))))
+        lists = min(lists, len(X))
+
+        # initialize the centroids from a random sample of the training
+        # vectors and refine them with a few rounds of k-means
+        rng = np.random.default_rng(self.seed)
+        X32 = X.astype("float32")
+        self.centroids = X32[rng.choice(len(X), lists, replace=False)]
+
+        for _ in range(self.iterations):
+            # move every centroid to the mean of the vectors assigned to
+            # it (empty clusters simply keep their previous centroid)
+            assign = self._nearest_centroids(X32, 1)[:, 0]
+            order = np.argsort(assign, kind="stable")
+            bounds = np.searchsorted(assign[order], np.arange(lists + 1))
+
+            for l in range(lists):
+                members = order[bounds[l]:bounds[l + 1]]
+                if len(members) > 0:
+                    self.centroids[l] = X32[members].mean(axis=0,
+                        dtype="float64")
+
+        # group the training vectors by cluster so every inverted list is
+        # one contiguous block of rows
+        assign = self._nearest_centroids(X32, 1)[:, 0]
+        self.ids = np.argsort(assign, kind="stable")
+        self.offsets = np.searchsorted(assign[self.ids], np.arange(lists + 1))
+        self.X32 = X32[self.ids]
+        self.norms = np.einsum("ij,ij->i", self.X32, self.X32)
+
+        return self
+
+    def kneighbors(self, X):
+        Q = np.asarray(X).reshape((len(X), -1)).astype("float32")
+        qnorms = np.einsum("ij,ij->i", Q, Q)
+        k = min(self.neighbors, len(self.X32))
+        probes = min(self.probes, len(self.centroids))
+
+        # find the clusters to probe for every query, then invert that
+        # mapping so each list is visited once for all of its queries
+        probed = self._nearest_centroids(Q, probes)
+        qids = np.repeat(np.arange(len(Q)), probes)
+        lids = probed.ravel()
+        order = np.argsort(lids, kind="stable")
+        (qids, lids) = (qids[order], lids[order])
+        bounds = np.searchsorted(lids, np.arange(len(self.centroids) + 1))
+
+        bestD = np.full((len(Q), k), np.inf, dtype="float32")
+        bestI = np.full((len(Q), k), -1, dtype="int64")
+
+        for l in range(len(self.centroids)):
+            qs = qids[bounds[l]:bounds[l + 1]]
+            (start, end) = (self.offsets[l], self.offsets[l + 1])
+            if len(qs) == 0 or start == end:
+                continue
+
+            # compute the distances to every vector of the list with one
+            # matrix multiplication and merge them into the running top-k
+            dists = Q[qs] @ self.X32[start:end].T
+            dists *= -2
+            dists += self.norms[start:end]
+            dists += qnorms[qs][:, np.newaxis]
+
+            allD = np.concatenate([bestD[qs], dists], axis=1)
+            allI = np.concatenate([bestI[qs], np.broadcast_to(
+                self.ids[start:end], dists.shape)], axis=1)
+            top = np.argpartition(allD, k - 1, axis=1)[:, :k]
+            bestD[qs] = np.take_along_axis(allD, top, axis=1)
+            bestI[qs] = np.take_along_axis(allI, top, axis=1)
+
+        # sort the neighbors of every query by distance
+        order = np.argsort(bestD, axis=1, kind="stable")
+        bestD = np.take_along_axis(bestD, order, axis=1)
+        bestI = np.take_along_axis(bestI, order, axis=1)
+
+        return (np.sqrt(np.maximum(bestD, 0)), bestI)
+
+def recall(approx, exact):
+    # the fraction of the exact neighbors the approximate search found
+    hits = (approx[:, :, np.newaxis] == exact[:, np.newaxis, :]).any(axis=2)
+    return hits.sum() / float(exact.size)
@@ -0,0 +1,121 @@
+import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+class KNNClassifier:
+    def __init__(self, neighbors=1, jobs=-1, memoryBudget=256 * 1024 * 1024,
+        refine=8):
+        # store the number of neighbors, the number of query chunks to
+        # run concurrently (-1 uses all available cores), the number of
+        # bytes the distance matrices may occupy at once, and how many
+        # extra float32 candidates are re-ranked with exact distances
+        self.neighbors = neighbors
+        self.jobs = jobs
+        self.memoryBudget = memoryBudget
+        self.refine = refine
+
+    def fit(self, X, y):
+        # keep the training vectors (in their own type) for re-ranking
+        # along with a float32 copy and its squared norms for the BLAS pass
+        self.X = np.asarray(X).reshape((len(X), -1))
+        self.X32 = self.X.astype("float32")
+        self.norms = np.einsum("ij,ij->i", self.X32, self.X32)
+
+        # encode the labels as integers into the table of classes
+        (self.classes_, self.y) = np.unique(y, return_inverse=True)
+
+        return self
+
+    def _jobs(self):
+        if self.jobs is None or self.jobs < 1:
+            return os.cpu_count() or 1
+
+        return self.jobs
+
+    def _chunk_size(self, jobs):
+        # every concurrent chunk holds a (chunk, nTrain) float32 distance
+        # matrix plus, in the worst case, the float64 candidate vectors
+        # being re-ranked, so size the chunks such that all of them
+        # together stay within the memory budget
+        m = min(self.neighbors + self.refine, len(self.X))
+        perRow = (4 * len(self.X) + 8 * m * self.X.shape[1]) * jobs
+        return max(1, self.memoryBudget // perRow)
+
+    def _kneighbors_chunk(self, Q):
+        # compute squared L2 distances as |q|^2 + |x|^2 - 2 q.x, where the
+        # cross term is a single float32 matrix multiplication
+        Q32 = Q.astype("float32")
+        dists = Q32 @ self.X32.T
+        dists *= -2
+        dists += self.norms
+        qnorms = np.einsum("ij,ij->i", Q32, Q32)
+        dists += qnorms[:, np.newaxis]
+
+        # pick a few more candidates than needed with `argpartition` (no
+        # full sort) and order them by (distance, index)
+        k = min(self.neighbors, len(self.X))
+        m = min(k + self.refine, len(self.X))
+        if m == 1:
+            cand = dists.argmin(axis=1)[:, np.newaxis]
+        elif m < len(self.X):
+            cand = np.argpartition(dists, m - 1, axis=1)[:, :m]
+        else:
+            cand = np.broadcast_to(np.arange(len(self.X)), (len(Q), m))
+
+        cd = np.take_along_axis(dists, cand, axis=1)
+        order = np.lexsort((cand, cd), axis=1)
+        cand = np.take_along_axis(cand, order, axis=1)
+        cd = np.take_along_axis(cd, order, axis=1)
+
+        # float32 rounding can only change the result for queries whose
+        # leading k + 1 candidates include two closer together than the
+        # rounding error, so re-rank just those queries using exact
+        # float64 distances
+        if m > 1:
+            tol = 1e-4 * (qnorms + self.norms.max())
+            gaps = np.diff(cd[:, :k + 1], axis=1).min(axis=1)
+            (amb,) = np.nonzero(gaps <= tol)
+
+            if len(amb) > 0:
+                diff = self.X[cand[amb]].astype("float64") - \
+                    Q[amb][:, np.newaxis, :]
+                exact = np.einsum("ijk,ijk->ij", diff, diff)
+                order = np.lexsort((cand[amb], exact), axis=1)
+                cand[amb] = np.take_along_axis(cand[amb], order, axis=1)
+                cd[amb] = np.take_along_axis(exact, order, axis=1)
+
+        return (np.sqrt(np.maximum(cd[:, :k], 0)), cand[:, :k])
+
+    def kneighbors(self, X):
+        Q = np.asarray(X).reshape((len(X), -1))
+        jobs = self._jobs()
+        chunk = self._chunk_size(jobs)
+        starts = range(0, len(Q), chunk)
+
+        # process the queries in chunks, running several of them
+        # concurrently (the matrix multiplication releases the GIL)
+        run = lambda i: self._kneighbors_chunk(Q[i:i + chunk])
+        if jobs == 1:
+            results = [run(i) for i in starts]
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(run, starts))
+
+        if len(results) == 0:
+            k = min(self.neighbors, len(self.X))
+            return (np.empty((0, k)), np.empty((0, k), dtype="int64"))
+
+        return (np.concatenate([r[0] for r in results]),
+            np.concatenate([r[1] for r in results]))
+
+    def predict(self, X):
+        (_, idxs) = self.kneighbors(X)
+
+        # take a majority vote over the neighbor labels, breaking ties in
+        # favor of the smallest class index (just like scikit-learn) and
+        # ignoring missing neighbors (marked with a negative index)
+        votes = np.zeros((len(idxs), len(self.classes_)), dtype="int64")
+        rows = np.repeat(np.arange(len(idxs)), idxs.shape[1])
+        np.add.at(votes, (rows, self.y[idxs].ravel()), (idxs >= 0).ravel())
+
+        return self.classes_[votes.argmax(axis=1)]
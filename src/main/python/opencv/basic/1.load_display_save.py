@@ -1,7 +1,16 @@
+import os
+import sys
 import cv2
 import requests
 from PIL import Image
 
+# the `datasets` and `preprocessing` packages live at the root of the
+# python sources
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+	"..", ".."))
+from datasets import URLFetcher, SimpleDatasetLoader, ImageWriter
+from preprocessing import SimplePreprocessor
+
 # Load 
 image = cv2.imread(args["image"])
 h, w, c = image.shape # height, width, channel
@@ -9,6 +18,18 @@ h, w, c = image.shape # height, width, channel
 ## Load from web
 pil_image = Image.open(requests.get(url, stream=True).raw)
 
+## Load many images from the web
+# download concurrently over kept-alive connections (at most 8 per host,
+# retrying transient failures) and decode in memory with cv2.imdecode
+fetcher = URLFetcher(perHost=8, retries=3)
+web_image = fetcher.fetch_image(url)
+
+# urls of the form http://host/dataset/{class}/{image}.jpg
+sdl = SimpleDatasetLoader(preprocessors=[SimplePreprocessor(32, 32)], workers=32,
+    fetcher=fetcher, reducedDecode=True)
+(data, labels) = sdl.load(urls)
+fetcher.close()
+
 # Show
 cv2.imshow("Image", image)
 cv2.waitKey(0)
@@ -21,4 +42,12 @@ plt.imshow(gray, cmap="gray", vmin=0, vmax=255)
 
 # Save
 cv2.imwrite("newimage.jpg", image)
-pil_image.save("newimage.jpg")
\ No newline at end of file
+pil_image.save("newimage.jpg")
+
+## Save many images without blocking
+# the images are encoded and written (atomically) by background workers
+# while the loop keeps computing; `close` waits for them and raises if
+# any write failed
+with ImageWriter(workers=4, params={".jpg": [cv2.IMWRITE_JPEG_QUALITY, 90]}) as writer:
+    for (i, image) in enumerate(data):
+        writer.write("output/{}.jpg".format(i), image)
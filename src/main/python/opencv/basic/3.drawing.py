@@ -1,6 +1,13 @@
+import os
+import sys
 import numpy as np
 import cv2
 
+# the `imageops` package lives at the root of the python sources
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+	"..", ".."))
+from imageops import circles, rectangles, lines
+
 # 3 Most basic methods to draw shapes
 # - Line: cv2.line. cv2.line(arr, p1, p2, color). p1=(cX,cY), color=(b,g,r)
 # - Rectangle: cv2.rectangle
@@ -32,3 +39,16 @@ for i in range(0, 25):
     # draw our random circle
     cv2.circle(canvas, tuple(pt), radius, color, -1)
 
+# Draw many shapes at once
+# the batch versions take arrays of shapes and rasterize them all in a few
+# NumPy passes (later shapes cover earlier ones, just like a loop of cv2
+# calls), giving exactly the same pixels as the per-call primitives
+canvas = np.zeros((300,300,3), dtype=np.uint8)
+radii = np.random.randint(5, high=200, size=(25,))
+colors = np.random.randint(0, high=256, size=(25, 3))
+centers = np.random.randint(0, high=300, size=(25, 2))
+circles(canvas, centers, radii, colors)
+
+corners = np.random.randint(0, high=300, size=(2, 100, 2))
+rectangles(canvas, corners[0], corners[1], red)
+lines(canvas, corners[0], corners[1], green)
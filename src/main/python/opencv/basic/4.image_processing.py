@@ -1,6 +1,13 @@
+import os
+import sys
 import numpy as np
 import cv2
 
+# the `imageops` package lives at the root of the python sources
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+	"..", ".."))
+from imageops import PixelMap, Transform, Mask, add, subtract
+
 # =========================================
 # 1. Translation
 # NOTE: Translating (shifting) an image is given by a NumPy matrix in
@@ -68,6 +75,16 @@ flipped = cv2.flip(image, -1)
 # Cropping an image is accomplished using simple Numpy array slices.
 crop  = image[y0:y1, x0:x1]
 
+# =========================================
+# 5b. Composed transforms
+# Every warpAffine/resize/flip above resamples (and allocates) the image
+# again. A Transform composes the whole chain into a single affine matrix
+# and resamples only once; applied to many frames of the same size (e.g.
+# video augmentation), the per-pixel source coordinates are computed once
+# and cached, so each frame costs a single cv2.remap
+transform = Transform(w, h).translate(25, 50).rotate(45).resize(150, 150).flip(1)
+augmented = transform.apply(image)
+
 # =========================================
 # 6. Image Arithmetic
 
@@ -108,6 +125,17 @@ added = cv2.add(image, M)
 M = np.ones(image.shape, dtype = "uint8") * 50
 subtracted = cv2.subtract(image, M)
 
+# NOTE: building a full-size array of 100's costs two extra image-sized
+# temporaries. For 8-bit images, any per-pixel map is fully described by a
+# 256-entry lookup table, so the helpers in `imageops` saturate in a single
+# pass over the image (and can write into an existing buffer with `out=`)
+added = add(image, 100)
+subtracted = subtract(image, 50)
+
+# chains of such maps (brightness, contrast, gamma) fuse into one table
+# and are still applied with a single lookup pass
+adjusted = PixelMap().add(30).contrast(1.2).gamma(1.5).apply(image)
+
 # =========================================
 # 7. Bitwise operations
 
@@ -155,6 +183,23 @@ mask = np.zeros(image.shape[:2], dtype="uint8")
 cv2.circle(mask, (145, 200), 100, 255, -1)
 masked = cv2.bitwise_and(image, image, mask=mask)
 
+# Masks that only cover their bounding box
+# the same masks, stored as their bounding box so that applying them,
+# combining them and measuring under them only touches the covered region
+rect = Mask.rectangle(image.shape, (0, 90), (290, 450))
+circ = Mask.circle(image.shape, (145, 200), 100)
+masked = circ.apply(image)
+both = rect & circ
+either = rect | circ
+(mean, std) = (rect ^ circ).mean_std(image)
+region = circ.crop_image(image)
+
+# convert to and from run-length rows and dense masks
+runs = circ.runs()
+circ = Mask.from_runs(image.shape, runs)
+mask = circ.to_dense()
+circ = Mask.from_dense(mask)
+
 # =========================================
 # 9. Splitting and Merging Channel
 
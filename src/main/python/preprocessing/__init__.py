@@ -0,0 +1,2 @@
+from .simplepreprocessor import SimplePreprocessor
+from .preprocessingpipeline import PreprocessingPipeline
\ No newline at end of file
@@ -0,0 +1,89 @@
+import numpy as np
+import cv2
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def accepts_out(cls):
+    # whether the `preprocess` method of a preprocessor class takes an
+    # `out` argument to write into (plain preprocessors only take the
+    # image)
+    try:
+        params = inspect.signature(cls.preprocess).parameters
+    except (TypeError, ValueError):
+        return False
+
+    return "out" in params or any(p.kind == p.VAR_KEYWORD
+        for p in params.values())
+
+class PreprocessingPipeline:
+    def __init__(self, preprocessors=None, colorConversion=None, dtype=None,
+        scale=1.0):
+        # store the chain of preprocessors along with the optional color
+        # conversion (e.g. cv2.COLOR_BGR2RGB) and output data type (with
+        # a scale factor, e.g. 1 / 255.0 for float inputs) applied last
+        self.preprocessors = preprocessors
+        if self.preprocessors is None:
+            self.preprocessors = []
+
+        self.colorConversion = colorConversion
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self.scale = scale
+
+    def preprocess(self, image, out=None):
+        # run the chain of preprocessors, letting the last one write
+        # straight into the output slot when nothing follows it and it
+        # knows how to (otherwise its result is copied in below)
+        last = len(self.preprocessors) - 1
+        direct = self.colorConversion is None and self.dtype is None
+
+        for (i, p) in enumerate(self.preprocessors):
+            if i == last and direct and out is not None and \
+                accepts_out(type(p)):
+                image = p.preprocess(image, out=out)
+            else:
+                image = p.preprocess(image)
+
+        # the color conversion and cast run on the already resized image,
+        # so they only ever touch the (small) output-sized pixels
+        if self.colorConversion is not None:
+            dst = out if self.dtype is None else None
+            image = cv2.cvtColor(image, self.colorConversion, dst=dst)
+
+        if self.dtype is not None:
+            if out is None:
+                out = np.empty(image.shape, dtype=self.dtype)
+            np.multiply(image, self.scale, out=out, casting="unsafe")
+            image = out
+
+        if out is not None and image is not out:
+            out[...] = image
+            image = out
+
+        return image
+
+    def preprocess_batch(self, images, out=None, workers=None):
+        # run the first image through the pipeline to learn the output
+        # shape and type, then allocate one array for the whole batch
+        if out is None:
+            first = self.preprocess(images[0])
+            out = np.empty((len(images),) + first.shape, dtype=first.dtype)
+            out[0] = first
+            start = 1
+        else:
+            start = 0
+
+        # every image is processed end-to-end by a single thread, so each
+        # pass runs while the pixels are still hot in cache
+        def process(i):
+            self.preprocess(images[i], out=out[i])
+
+        if workers == 1:
+            for i in range(start, len(images)):
+                process(i)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(process, range(start, len(images))))
+
+        return out
@@ -1,4 +1,6 @@
+import numpy as np
 import cv2
+from concurrent.futures import ThreadPoolExecutor
 
 class SimplePreprocessor:
     def __init__(self, width, height, inter=cv2.INTER_AREA):
@@ -6,6 +8,41 @@ class SimplePreprocessor:
         self.height = height
         self.inter = inter
     
-    def preprocess(self, image):
-        return cv2.resize(image, (self.width, self.height), 
-            interpolation=self.inter)
\ No newline at end of file
+    def preprocess(self, image, out=None):
+        # resize the image, writing straight into `out` when given
+        return cv2.resize(image, (self.width, self.height), dst=out,
+            interpolation=self.inter)
+
+    def preprocess_batch(self, images, out=None, workers=None):
+        # allocate one output array for the whole batch (unless the
+        # caller hands us one to reuse), shaped after the first image
+        shape = (len(images), self.height, self.width) + images[0].shape[2:]
+        if out is None:
+            out = np.empty(shape, dtype=images[0].dtype)
+
+        # cv2 silently allocates a new array rather than writing into a
+        # slot of the wrong shape or type, so check the batch up front
+        if out.shape != shape or out.dtype != images[0].dtype or \
+            not out.flags.c_contiguous:
+            raise ValueError("out must be a contiguous {} array of shape {}".format(
+                images[0].dtype, shape))
+
+        # resize every image directly into its slot -- cv2 releases the
+        # GIL while resizing, so a thread pool spreads the batch across
+        # cores without any pickling
+        def resize(i):
+            if images[i].shape[2:] != shape[3:] or images[i].dtype != out.dtype:
+                raise ValueError("image {} has shape {} and type {}, expected (h, w{}) and {}".format(
+                    i, images[i].shape, images[i].dtype, "".join(", {}".format(c)
+                    for c in shape[3:]), out.dtype))
+
+            self.preprocess(images[i], out=out[i])
+
+        if workers == 1:
+            for i in range(len(images)):
+                resize(i)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(resize, range(len(images))))
+
+        return out